@@ -14,10 +14,13 @@ Requirements:
 """
 
 import os
+import re
 import logging
 import threading
 from typing import Dict, Optional, Tuple
 from contextlib import contextmanager
+from functools import lru_cache
+from collections import defaultdict
 
 from dotenv import load_dotenv
 import pyodbc
@@ -46,8 +49,10 @@ DB_CONFIG: Dict[str, object] = {
 }
 
 # -----------------------
-# In-memory Schema Cache (thread-safe)
+# In-memory Schema Cache (copy-on-write)
 # -----------------------
+# Readers take a reference to the current snapshot without locking; the lock
+# only serializes rebuilds, which publish a fresh dict in a single rebind.
 _schema_lock = threading.RLock()
 db_schema_cache = {"tables": {}, "columns": {}, "objects": {}, "jobs": {}}
 
@@ -78,51 +83,74 @@ def db_cursor():
 # Cache Loader
 # -----------------------
 def load_schema_cache() -> Dict[str, int]:
+    global db_schema_cache
     with _schema_lock:
         with db_cursor() as cursor:
             cursor.execute("SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE='BASE TABLE'")
             tables = [row.TABLE_NAME for row in cursor.fetchall()]
-            db_schema_cache["tables"] = {t.lower(): t for t in tables}
+            new_tables = {t.lower(): t for t in tables}
 
-            db_schema_cache["columns"] = {}
-            for table in tables:
-                cursor.execute("SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME = ?", table)
-                cols = [row.COLUMN_NAME for row in cursor.fetchall()]
-                db_schema_cache["columns"][table.lower()] = {c.lower(): c for c in cols}
+            # All base-table columns in one round-trip, grouped per table
+            cursor.execute(
+                "SELECT C.TABLE_NAME, C.COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS C "
+                "JOIN INFORMATION_SCHEMA.TABLES T "
+                "ON T.TABLE_SCHEMA = C.TABLE_SCHEMA AND T.TABLE_NAME = C.TABLE_NAME "
+                "WHERE T.TABLE_TYPE = 'BASE TABLE'"
+            )
+            cols_by_table: Dict[str, Dict[str, str]] = defaultdict(dict)
+            for row in cursor.fetchall():
+                cols_by_table[row.TABLE_NAME.lower()][row.COLUMN_NAME.lower()] = row.COLUMN_NAME
+            new_columns = dict(cols_by_table)
 
             cursor.execute(
                 "SELECT ROUTINE_NAME AS obj FROM INFORMATION_SCHEMA.ROUTINES "
                 "UNION SELECT TABLE_NAME AS obj FROM INFORMATION_SCHEMA.VIEWS"
             )
-            db_schema_cache["objects"] = {row.obj.lower(): row.obj for row in cursor.fetchall()}
+            new_objects = {row.obj.lower(): row.obj for row in cursor.fetchall()}
 
             try:
                 cursor.execute("SELECT name FROM msdb.dbo.sysjobs")
-                db_schema_cache["jobs"] = {row.name.lower(): row.name for row in cursor.fetchall()}
+                new_jobs = {row.name.lower(): row.name for row in cursor.fetchall()}
             except Exception:
-                db_schema_cache["jobs"] = {}
+                new_jobs = {}
+
+        db_schema_cache = {"tables": new_tables, "columns": new_columns, "objects": new_objects, "jobs": new_jobs}
 
     return {
-        "tables": len(db_schema_cache["tables"]),
-        "objects": len(db_schema_cache["objects"]),
-        "jobs": len(db_schema_cache["jobs"]),
+        "tables": len(new_tables),
+        "objects": len(new_objects),
+        "jobs": len(new_jobs),
     }
 
 # -----------------------
 # Validators
 # -----------------------
 def validate_table_column(table: str, column: Optional[str] = None) -> Tuple[str, Optional[str]]:
-    with _schema_lock:
-        real_table = db_schema_cache["tables"].get(table.lower())
-        if not real_table:
-            raise ValueError(f"Table '{table}' not found.")
-        if column:
-            real_column = db_schema_cache["columns"].get(table.lower(), {}).get(column.lower())
-            if not real_column:
-                raise ValueError(f"Column '{column}' not found in table '{table}'.")
-            return real_table, real_column
+    snap = db_schema_cache
+    real_table = snap["tables"].get(table.lower())
+    if not real_table:
+        raise ValueError(f"Table '{table}' not found.")
+    if column:
+        real_column = snap["columns"].get(table.lower(), {}).get(column.lower())
+        if not real_column:
+            raise ValueError(f"Column '{column}' not found in table '{table}'.")
+        return real_table, real_column
     return real_table, None
 
+# -----------------------
+# Text matchers
+# -----------------------
+@lru_cache(maxsize=1024)
+def _col_regex(col: str) -> "re.Pattern[str]":
+    """Case-insensitive whole-word matcher for a column name (memoized per name)."""
+    return re.compile(rf"\b{re.escape(col)}\b", re.IGNORECASE)
+
+_RE_WRITE_VERB = re.compile(r"\b(?:insert\s+into|update)\b", re.IGNORECASE)
+
+def _like_escape(value: str) -> str:
+    """Escape LIKE wildcards so `value` matches literally inside a pattern."""
+    return value.replace("[", "[[]").replace("%", "[%]").replace("_", "[_]")
+
 # -----------------------
 # MCP Server
 # -----------------------
@@ -164,19 +192,27 @@ def get_column_data(table: str, select_col: str, where_col: str, value: str) ->
 @mcp.tool
 def get_column_population_logic(column: str) -> Dict[str, object]:
     with db_cursor() as cursor:
-        cursor.execute("SELECT ROUTINE_NAME, ROUTINE_DEFINITION FROM INFORMATION_SCHEMA.ROUTINES WHERE ROUTINE_TYPE='PROCEDURE'")
+        # Coarse filter server-side so only candidate bodies cross the wire; CI collation so
+        # case-sensitive databases still match lower-case `insert into` / `update`
+        cursor.execute("""
+            SELECT ROUTINE_NAME, ROUTINE_DEFINITION
+            FROM INFORMATION_SCHEMA.ROUTINES
+            WHERE ROUTINE_TYPE = 'PROCEDURE'
+              AND ROUTINE_DEFINITION COLLATE Latin1_General_CI_AS LIKE ?
+              AND (ROUTINE_DEFINITION COLLATE Latin1_General_CI_AS LIKE '%INSERT%'
+                   OR ROUTINE_DEFINITION COLLATE Latin1_General_CI_AS LIKE '%UPDATE%')
+        """, f"%{_like_escape(column)}%")
         matches = []
-        for proc in cursor.fetchall():
-            definition = getattr(proc, "ROUTINE_DEFINITION", "") or ""
-            dlow = definition.lower()
-            if column.lower() in dlow and ("insert into" in dlow or "update" in dlow):
+        # Stream rows: each definition is dropped as soon as it has been checked
+        for proc in cursor:
+            definition = proc.ROUTINE_DEFINITION or ""
+            if _col_regex(column).search(definition) and _RE_WRITE_VERB.search(definition):
                 matches.append(proc.ROUTINE_NAME)
     return {"success": True, "column": column, "procedures": matches}
 
 @mcp.tool
 def get_object_definition(object: str) -> Dict[str, object]:
-    with _schema_lock:
-        real_object = db_schema_cache["objects"].get(object.lower())
+    real_object = db_schema_cache["objects"].get(object.lower())
     if not real_object:
         raise ValueError("Object not found.")
     with db_cursor() as cursor:
@@ -186,8 +222,7 @@ def get_object_definition(object: str) -> Dict[str, object]:
 
 @mcp.tool
 def get_job_status(job: str) -> Dict[str, object]:
-    with _schema_lock:
-        real_job = db_schema_cache["jobs"].get(job.lower())
+    real_job = db_schema_cache["jobs"].get(job.lower())
     if not real_job:
         raise ValueError("Job not found.")
     query = """
@@ -222,9 +257,9 @@ def resource_index() -> str:
             load_schema_cache()
         except Exception:
             pass
-    with _schema_lock:
-        tcount = len(db_schema_cache["tables"])
-        jcount = len(db_schema_cache["jobs"])
+    snap = db_schema_cache
+    tcount = len(snap["tables"])
+    jcount = len(snap["jobs"])
     return (
         "# SQL Metadata Index\n\n"
         f"- **Tables:** {tcount} (see `sql://tables`)\n"
@@ -243,8 +278,7 @@ def resource_tables() -> str:
             load_schema_cache()
         except Exception:
             pass
-    with _schema_lock:
-        tables = sorted(db_schema_cache["tables"].values())
+    tables = sorted(db_schema_cache["tables"].values())
     if not tables:
         return "# Tables\n\n_No tables found in cache. Run the `refresh_schema` tool and try again_."
     lines = ["# Tables", "", f"Total: **{len(tables)}**", ""]
@@ -263,8 +297,7 @@ def resource_jobs() -> str:
             load_schema_cache()
         except Exception:
             pass
-    with _schema_lock:
-        jobs = sorted(db_schema_cache["jobs"].values())
+    jobs = sorted(db_schema_cache["jobs"].values())
     if not jobs:
         return "# Jobs\n\n_No jobs found in cache. Run the `refresh_schema` tool and try again_."
     lines = ["# Jobs", "", f"Total: **{len(jobs)}**", ""]
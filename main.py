@@ -17,9 +17,13 @@ import os
 import re
 import logging
 import threading
+import time
+from queue import LifoQueue, Empty, Full
 from typing import Dict, Optional, Tuple, List, Any
 from contextlib import contextmanager
 from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from operator import itemgetter
 from datetime import datetime, timedelta
 
 import pyodbc
@@ -45,6 +49,12 @@ DEFAULT_LINEAGE_MAX_DEPTH = int(os.getenv("LINEAGE_MAX_DEPTH", "5"))   # variabl
 MAX_ALLOWED_LINEAGE_DEPTH = 10                                        # hard cap
 MAX_PROC_SCAN = int(os.getenv("MAX_PROC_SCAN", "3000"))               # cap fallback scans
 USE_THREADLOCAL_CONN = os.getenv("DB_THREADLOCAL", "0") == "1"        # optional TL reuse
+SCORE_WORKERS = int(os.getenv("SCORE_WORKERS", "8"))                  # parallel candidate scoring
+MAX_SCORE_CANDIDATES = int(os.getenv("MAX_SCORE_CANDIDATES", "32"))   # cap per-candidate fallback scoring
+MAX_COLUMN_DATA_ROWS = int(os.getenv("MAX_COLUMN_DATA_ROWS", "20"))   # server-side cap for get_column_data
+DB_POOL_SIZE = int(os.getenv("DB_POOL", "16"))                        # idle conns kept per pool
+DB_POOL_PING_IDLE = float(os.getenv("DB_POOL_PING_IDLE", "60"))       # seconds idle before liveness ping
+SCHEMA_PREWARM_BLOCKING = os.getenv("SCHEMA_PREWARM_BLOCKING", "0") == "1"  # wait for cache before serving
 
 # Provenance: expose DB name only (no server) — default ON
 EXPOSE_DATABASE_ONLY = os.getenv("DOTA_EXPOSE_DATABASE", "1") == "1"
@@ -65,8 +75,10 @@ DB_CONFIG: Dict[str, object] = {
 }
 
 # Locks
-_config_lock = threading.RLock()   # DB_CONFIG changes
-_schema_lock = threading.RLock()   # schema & proc/deps caches
+# DB_CONFIG is never mutated in place: writers build a new dict and rebind the
+# module global under _config_lock, so readers can snapshot it lock-free.
+_config_lock = threading.RLock()   # serializes DB_CONFIG writers
+_schema_lock = threading.RLock()   # schema cache writers (readers snapshot lock-free)
 
 # Optional: thread-local connections
 _tls = threading.local()
@@ -90,18 +102,84 @@ def _get_tl_conn():
     return conn
 
 def get_db_connection():
-    with _config_lock:
-        return _get_tl_conn() if USE_THREADLOCAL_CONN else pyodbc.connect(_build_conn_str(DB_CONFIG), autocommit=True)
+    return _get_tl_conn() if USE_THREADLOCAL_CONN else pyodbc.connect(_build_conn_str(DB_CONFIG), autocommit=True)
+
+# LIFO pools of idle connections: (conn, conn_str, last_used). Metadata connections
+# carry READ UNCOMMITTED for their whole life, so they never mix with the default pool.
+_pools: Dict[str, LifoQueue] = {
+    "default": LifoQueue(maxsize=DB_POOL_SIZE),
+    "metadata": LifoQueue(maxsize=DB_POOL_SIZE),
+}
+
+def _pool_checkout(kind: str) -> Tuple[Any, str]:
+    conn_str = _build_conn_str(DB_CONFIG)
+    pool = _pools[kind]
+    while True:
+        try:
+            conn, cs, last_used = pool.get_nowait()
+        except Empty:
+            break
+        if cs != conn_str:
+            # pooled before a connection switch
+            try: conn.close()
+            except Exception: pass
+            continue
+        if time.monotonic() - last_used > DB_POOL_PING_IDLE:
+            try:
+                conn.execute("SELECT 1").fetchone()
+            except Exception:
+                try: conn.close()
+                except Exception: pass
+                continue
+        return conn, conn_str
+    conn = pyodbc.connect(conn_str, autocommit=True)
+    if kind == "metadata":
+        conn.execute("SET TRANSACTION ISOLATION LEVEL READ UNCOMMITTED;")
+    return conn, conn_str
+
+def _pool_checkin(kind: str, conn, conn_str: str, healthy: bool) -> None:
+    if healthy:
+        try:
+            _pools[kind].put_nowait((conn, conn_str, time.monotonic()))
+            return
+        except Full:
+            pass
+    try: conn.close()
+    except Exception: pass
+
+def _drain_pools() -> None:
+    for pool in _pools.values():
+        while True:
+            try:
+                conn, _, _ = pool.get_nowait()
+            except Empty:
+                break
+            try: conn.close()
+            except Exception: pass
 
 @contextmanager
-def db_cursor():
-    """General cursor (default isolation)."""
-    conn = get_db_connection()
+def _pooled_cursor(kind: str):
+    conn, conn_str = _pool_checkout(kind)
+    cur = conn.cursor()
+    healthy = False
     try:
-        yield conn.cursor()
+        yield cur
+        healthy = True
     finally:
-        if not USE_THREADLOCAL_CONN:
-            conn.close()
+        try:
+            cur.close()
+        except Exception:
+            healthy = False
+        _pool_checkin(kind, conn, conn_str, healthy)
+
+@contextmanager
+def db_cursor():
+    """General cursor (default isolation)."""
+    if not USE_THREADLOCAL_CONN:
+        with _pooled_cursor("default") as cur:
+            yield cur
+        return
+    yield get_db_connection().cursor()
 
 @contextmanager
 def metadata_cursor():
@@ -109,14 +187,13 @@ def metadata_cursor():
     Metadata cursor that avoids blocking via READ UNCOMMITTED.
     Only for catalog queries; DO NOT use for transactional data reads.
     """
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("SET TRANSACTION ISOLATION LEVEL READ UNCOMMITTED;")
-        yield cur
-    finally:
-        if not USE_THREADLOCAL_CONN:
-            conn.close()
+    if not USE_THREADLOCAL_CONN:
+        with _pooled_cursor("metadata") as cur:
+            yield cur
+        return
+    cur = get_db_connection().cursor()
+    cur.execute("SET TRANSACTION ISOLATION LEVEL READ UNCOMMITTED;")
+    yield cur
 
 def _test_connection(cfg: Dict[str, object]) -> Tuple[bool, Optional[str]]:
     try:
@@ -135,14 +212,16 @@ def set_db_config(
     timeout: Optional[int] = None,
     login_timeout: Optional[int] = None,
 ) -> Dict[str, object]:
+    global DB_CONFIG, db_schema_cache, _schema_version, _schema_loaded
+    cfg = DB_CONFIG
     proposed = {
         "server": server,
         "database": database,
         "username": username,
         "password": password,
-        "driver": driver or DB_CONFIG.get("driver", "{ODBC Driver 17 for SQL Server}"),
-        "timeout": int(timeout if timeout is not None else DB_CONFIG.get("timeout", 30)),
-        "login_timeout": int(login_timeout if login_timeout is not None else DB_CONFIG.get("login_timeout", 15)),
+        "driver": driver or cfg.get("driver", "{ODBC Driver 17 for SQL Server}"),
+        "timeout": int(timeout if timeout is not None else cfg.get("timeout", 30)),
+        "login_timeout": int(login_timeout if login_timeout is not None else cfg.get("login_timeout", 15)),
     }
 
     ok, err = _test_connection(proposed)
@@ -150,9 +229,10 @@ def set_db_config(
         raise ValueError(f"Connection failed: {err}")
 
     with _config_lock:
-        DB_CONFIG.update(proposed)
+        DB_CONFIG = {**DB_CONFIG, **proposed}
 
-    # Close any thread-local connection so the next call re-opens with new config
+    # Drop pooled / thread-local connections so the next call re-opens with new config
+    _drain_pools()
     if USE_THREADLOCAL_CONN:
         old = getattr(_tls, "conn", None)
         if old:
@@ -162,15 +242,22 @@ def set_db_config(
 
     # Invalidate caches on switch
     with _schema_lock:
-        for k in list(db_schema_cache.keys()):
-            db_schema_cache[k] = {} if isinstance(db_schema_cache[k], dict) else {}
+        db_schema_cache = {k: {} for k in db_schema_cache}
+        _schema_version += 1
+        _schema_loaded = False
     _lineage_core.cache_clear()
+    _cached_query.cache_clear()
+    _writing_procs_memo.cache_clear()
+    _trigger_writers_memo.cache_clear()
+    _table_row_count.cache_clear()
 
     counts = load_schema_cache()
     return {"success": True, "connected_to": {"server": server, "database": database}, "schema_counts": counts}
 
 # -------------------------------------------------------------------
 # In-memory Caches (copy-on-write updates)
+# Writers build a complete new dict and rebind db_schema_cache under
+# _schema_lock; readers take `snap = db_schema_cache` once and never lock.
 # -------------------------------------------------------------------
 db_schema_cache: Dict[str, Any] = {
     "tables": {},           # {lower_table_name: TableName}
@@ -181,146 +268,173 @@ db_schema_cache: Dict[str, Any] = {
     "procedures": {},       # {object_id: {object_id, schema, name, definition}}
     "rev_deps": {},         # {(schema_lower, name_lower): set(proc_object_id, ...)}
     "synonyms": {},         # {(syn_schema_lower, syn_name_lower): {...}}
-    "synonyms_by_base": {}  # {(base_schema_lower, base_name_lower): [(syn_schema, syn_name), ...]}
+    "synonyms_by_base": {}, # {(base_schema_lower, base_name_lower): [(syn_schema, syn_name), ...]}
+    "table_meta": {},       # {lower_schema.table: {schema, name, dbo_pref, npref}}
 }
+_schema_version = 0   # bumped on every publish; keys derived caches (rendered resources)
+_schema_loaded = False  # True once a load has published, even if the database has no tables/jobs
 
 # -------------------------------------------------------------------
 # Cache Loader (copy-on-write)
 # -------------------------------------------------------------------
 def load_schema_cache() -> Dict[str, int]:
-    new_tables: Dict[str, str] = {}
-    new_columns: Dict[str, Dict[str, str]] = {}
-    new_col_index: Dict[str, List[str]] = {}
-    new_objects: Dict[str, str] = {}
-    new_jobs: Dict[str, str] = {}
-    new_procs: Dict[int, Dict[str, Any]] = {}
-    new_revdeps: Dict[Tuple[str, str], set] = {}
-    new_synonyms: Dict[Tuple[str, str], Dict[str, Any]] = {}
-    new_syn_by_base: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
-
-    with metadata_cursor() as cursor:
-        # Tables
-        cursor.execute("SELECT TABLE_SCHEMA, TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE='BASE TABLE'")
-        tbl_rows = cursor.fetchall()
-        for r in tbl_rows:
-            new_tables[r.TABLE_NAME.lower()] = r.TABLE_NAME
-
-        # Columns + fully-qualified column index
-        for t in tbl_rows:
-            cursor.execute(
-                "SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA=? AND TABLE_NAME=?",
-                t.TABLE_SCHEMA, t.TABLE_NAME,
-            )
-            cols = [c.COLUMN_NAME for c in cursor.fetchall()]
-            new_columns[t.TABLE_NAME.lower()] = {c.lower(): c for c in cols}
-            fq = f"{t.TABLE_SCHEMA}.{t.TABLE_NAME}"
-            for c in cols:
-                new_col_index.setdefault(c.lower(), []).append(fq)
-
-        # Objects (routines + views) — store BOTH qualified and unqualified keys
-        cursor.execute("""
-            SELECT ROUTINE_SCHEMA AS obj_schema, ROUTINE_NAME AS obj_name
-            FROM INFORMATION_SCHEMA.ROUTINES
-            UNION ALL
-            SELECT TABLE_SCHEMA  AS obj_schema, TABLE_NAME  AS obj_name
-            FROM INFORMATION_SCHEMA.VIEWS
-        """)
-        for r in cursor.fetchall():
-            qname = f"{r.obj_schema}.{r.obj_name}"
-            new_objects[r.obj_name.lower()] = qname          # unqualified key -> qualified
-            new_objects[qname.lower()]      = qname          # qualified key   -> qualified
-
-        # Jobs (best-effort)
-        try:
-            cursor.execute("SELECT name FROM msdb.dbo.sysjobs")
-            for r in cursor.fetchall():
-                new_jobs[r.name.lower()] = r.name
-        except Exception:
-            pass
+    global db_schema_cache, _schema_version, _schema_loaded
+    # Builds are serialized; readers keep using the previous snapshot meanwhile
+    with _schema_lock:
+        new_tables: Dict[str, str] = {}
+        new_columns: Dict[str, Dict[str, str]] = {}
+        new_col_index: Dict[str, List[str]] = {}
+        new_objects: Dict[str, str] = {}
+        new_jobs: Dict[str, str] = {}
+        new_procs: Dict[int, Dict[str, Any]] = {}
+        new_revdeps: Dict[Tuple[str, str], set] = {}
+        new_synonyms: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        new_syn_by_base: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+        new_table_meta: Dict[str, Dict[str, Any]] = {}
 
-        # Procedures + definitions
-        try:
+        with metadata_cursor() as cursor:
+            # Tables, columns and objects in one batch: one round-trip, three result sets
             cursor.execute("""
-                SELECT p.object_id,
-                       OBJECT_SCHEMA_NAME(p.object_id) AS proc_schema,
-                       OBJECT_NAME(p.object_id) AS proc_name,
-                       m.definition
-                FROM sys.procedures p
-                JOIN sys.sql_modules m ON m.object_id = p.object_id
+                SELECT TABLE_SCHEMA, TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE='BASE TABLE';
+
+                SELECT SCHEMA_NAME(t.schema_id) AS sch, t.name AS tname, c.name AS cname
+                FROM sys.columns c
+                JOIN sys.tables t ON t.object_id = c.object_id
+                ORDER BY sch, tname, c.column_id;
+
+                SELECT ROUTINE_SCHEMA AS obj_schema, ROUTINE_NAME AS obj_name
+                FROM INFORMATION_SCHEMA.ROUTINES
+                UNION ALL
+                SELECT TABLE_SCHEMA  AS obj_schema, TABLE_NAME  AS obj_name
+                FROM INFORMATION_SCHEMA.VIEWS
             """)
+
+            # Tables
             for r in cursor.fetchall():
-                new_procs[r.object_id] = {
-                    "object_id": r.object_id,
-                    "schema": r.proc_schema,
-                    "name": r.proc_name,
-                    "definition": r.definition or "",
+                new_tables[r.TABLE_NAME.lower()] = r.TABLE_NAME
+                # Static disambiguation inputs; rowcounts are read live at scoring time
+                fq = f"{r.TABLE_SCHEMA}.{r.TABLE_NAME}"
+                new_table_meta[fq.lower()] = {
+                    "schema": r.TABLE_SCHEMA,
+                    "name": r.TABLE_NAME,
+                    "dbo_pref": int(r.TABLE_SCHEMA.lower() == "dbo"),
+                    "npref": _name_preference_score(fq),
                 }
-        except Exception:
-            new_procs = {}
 
-        # Reverse dependency index
-        try:
-            cursor.execute("""
-                SELECT d.referencing_id, d.referenced_id,
-                       OBJECT_SCHEMA_NAME(d.referenced_id) AS ref_schema,
-                       OBJECT_NAME(d.referenced_id) AS ref_name,
-                       o.[type] AS ref_type,
-                       o2.[type] AS referencing_type
-                FROM sys.sql_expression_dependencies d
-                LEFT JOIN sys.objects o   ON o.object_id  = d.referenced_id
-                LEFT JOIN sys.objects o2  ON o2.object_id = d.referencing_id
-            """)
+            # Columns + fully-qualified column index (one catalog pass, no per-table trips)
+            cursor.nextset()
             for r in cursor.fetchall():
-                if r.referencing_type != 'P' or not r.ref_schema or not r.ref_name:
-                    continue
-                key = (r.ref_schema.lower(), r.ref_name.lower())
-                s = new_revdeps.get(key)
-                if s is None:
-                    s = set()
-                    new_revdeps[key] = s
-                s.add(r.referencing_id)
-        except Exception:
-            new_revdeps = {}
+                new_columns.setdefault(r.tname.lower(), {})[r.cname.lower()] = r.cname
+                new_col_index.setdefault(r.cname.lower(), []).append(f"{r.sch}.{r.tname}")
 
-        # Synonyms + reverse mapping
-        try:
-            cursor.execute("""
-                SELECT s.name AS syn_name,
-                       SCHEMA_NAME(s.schema_id) AS syn_schema,
-                       PARSENAME(s.base_object_name, 1) AS base_object,
-                       PARSENAME(s.base_object_name, 2) AS base_schema,
-                       PARSENAME(s.base_object_name, 3) AS base_db,
-                       PARSENAME(s.base_object_name, 4) AS base_server
-                FROM sys.synonyms s
-            """)
+            # Objects (routines + views) — store BOTH qualified and unqualified keys
+            cursor.nextset()
             for r in cursor.fetchall():
-                syn_key = (r.syn_schema.lower(), r.syn_name.lower())
-                new_synonyms[syn_key] = {
-                    "syn_schema": r.syn_schema,
-                    "syn_name": r.syn_name,
-                    "base_schema": r.base_schema,
-                    "base_name": r.base_object,
-                    "base_db": r.base_db,
-                    "base_server": r.base_server,
-                }
-                if r.base_schema and r.base_object:
-                    bk = (r.base_schema.lower(), r.base_object.lower())
-                    new_syn_by_base.setdefault(bk, []).append((r.syn_schema, r.syn_name))
-        except Exception:
-            new_synonyms = {}
-            new_syn_by_base = {}
+                qname = f"{r.obj_schema}.{r.obj_name}"
+                new_objects[r.obj_name.lower()] = qname          # unqualified key -> qualified
+                new_objects[qname.lower()]      = qname          # qualified key   -> qualified
 
-    # Swap under the lock
-    with _schema_lock:
-        db_schema_cache["tables"] = new_tables
-        db_schema_cache["columns"] = new_columns
-        db_schema_cache["columns_index"] = new_col_index
-        db_schema_cache["objects"] = new_objects
-        db_schema_cache["jobs"] = new_jobs
-        db_schema_cache["procedures"] = new_procs
-        db_schema_cache["rev_deps"] = new_revdeps
-        db_schema_cache["synonyms"] = new_synonyms
-        db_schema_cache["synonyms_by_base"] = new_syn_by_base
+            # Jobs (best-effort)
+            try:
+                cursor.execute("SELECT name FROM msdb.dbo.sysjobs")
+                for r in cursor.fetchall():
+                    new_jobs[r.name.lower()] = r.name
+            except Exception:
+                pass
+
+            # Procedures + definitions
+            try:
+                cursor.execute("""
+                    SELECT p.object_id,
+                           OBJECT_SCHEMA_NAME(p.object_id) AS proc_schema,
+                           OBJECT_NAME(p.object_id) AS proc_name,
+                           m.definition
+                    FROM sys.procedures p
+                    JOIN sys.sql_modules m ON m.object_id = p.object_id
+                """)
+                for r in cursor.fetchall():
+                    new_procs[r.object_id] = {
+                        "object_id": r.object_id,
+                        "schema": r.proc_schema,
+                        "name": r.proc_name,
+                        "definition": r.definition or "",
+                    }
+            except Exception:
+                new_procs = {}
+
+            # Reverse dependency index
+            try:
+                cursor.execute("""
+                    SELECT d.referencing_id, d.referenced_id,
+                           OBJECT_SCHEMA_NAME(d.referenced_id) AS ref_schema,
+                           OBJECT_NAME(d.referenced_id) AS ref_name,
+                           o.[type] AS ref_type,
+                           o2.[type] AS referencing_type
+                    FROM sys.sql_expression_dependencies d
+                    LEFT JOIN sys.objects o   ON o.object_id  = d.referenced_id
+                    LEFT JOIN sys.objects o2  ON o2.object_id = d.referencing_id
+                """)
+                for r in cursor.fetchall():
+                    if r.referencing_type != 'P' or not r.ref_schema or not r.ref_name:
+                        continue
+                    key = (r.ref_schema.lower(), r.ref_name.lower())
+                    s = new_revdeps.get(key)
+                    if s is None:
+                        s = set()
+                        new_revdeps[key] = s
+                    s.add(r.referencing_id)
+            except Exception:
+                new_revdeps = {}
+
+            # Synonyms + reverse mapping
+            try:
+                cursor.execute("""
+                    SELECT s.name AS syn_name,
+                           SCHEMA_NAME(s.schema_id) AS syn_schema,
+                           PARSENAME(s.base_object_name, 1) AS base_object,
+                           PARSENAME(s.base_object_name, 2) AS base_schema,
+                           PARSENAME(s.base_object_name, 3) AS base_db,
+                           PARSENAME(s.base_object_name, 4) AS base_server
+                    FROM sys.synonyms s
+                """)
+                for r in cursor.fetchall():
+                    syn_key = (r.syn_schema.lower(), r.syn_name.lower())
+                    new_synonyms[syn_key] = {
+                        "syn_schema": r.syn_schema,
+                        "syn_name": r.syn_name,
+                        "base_schema": r.base_schema,
+                        "base_name": r.base_object,
+                        "base_db": r.base_db,
+                        "base_server": r.base_server,
+                    }
+                    if r.base_schema and r.base_object:
+                        bk = (r.base_schema.lower(), r.base_object.lower())
+                        new_syn_by_base.setdefault(bk, []).append((r.syn_schema, r.syn_name))
+            except Exception:
+                new_synonyms = {}
+                new_syn_by_base = {}
+
+        # Publish atomically (single name rebind)
+        db_schema_cache = {
+            "tables": new_tables,
+            "columns": new_columns,
+            "columns_index": new_col_index,
+            "objects": new_objects,
+            "jobs": new_jobs,
+            "procedures": new_procs,
+            "rev_deps": new_revdeps,
+            "synonyms": new_synonyms,
+            "synonyms_by_base": new_syn_by_base,
+            "table_meta": new_table_meta,
+        }
+        _schema_version += 1
+        _schema_loaded = True
+        # Scoring and lineage memos are derived from the old snapshot
+        _writing_procs_memo.cache_clear()
+        _trigger_writers_memo.cache_clear()
+        _table_row_count.cache_clear()
+        _lineage_core.cache_clear()
+        _cached_query.cache_clear()
 
     return {
         "tables": len(new_tables),
@@ -330,6 +444,19 @@ def load_schema_cache() -> Dict[str, int]:
         "synonyms": len(new_synonyms),
     }
 
+def _ensure_schema_loaded() -> None:
+    """Lazy first load for readers; once a snapshot is published (even an empty one) it is not reloaded here."""
+    if _schema_loaded:
+        return
+    with _schema_lock:
+        # A concurrent load (e.g. the startup prewarm) may have published while we waited
+        if _schema_loaded:
+            return
+        try:
+            load_schema_cache()
+        except Exception:
+            pass
+
 # -------------------------------------------------------------------
 # Validators & Utils
 # -------------------------------------------------------------------
@@ -407,6 +534,16 @@ def _object_id(schema: str, name: str) -> Optional[int]:
         r = cursor.fetchone()
         return r[0] if r and r[0] else None
 
+@lru_cache(maxsize=4096)
+def _cached_query(sql: str, params: tuple) -> tuple:
+    """
+    Memoized metadata read keyed by (sql, bind params); rows come back as plain tuples.
+    Cleared on refresh_schema / connection switch. Catalog queries only.
+    """
+    with metadata_cursor() as c:
+        c.execute(sql, *params)
+        return tuple(tuple(r) for r in c.fetchall())
+
 # --- Regex Parsers for Assignments ---
 _RE_UPDATE_SET = re.compile(
     r"""UPDATE\s+(?P<tgt>[\[\]A-Za-z0-9_\.]+)\s+SET\s+(?P<sets>.+?)\s+(?:WHERE|OUTPUT|OPTION|;|$)""",
@@ -436,6 +573,89 @@ _RE_INSERT_VALUES = re.compile(
     re.IGNORECASE | re.DOTALL | re.VERBOSE,
 )
 
+# --- Prompt parsers for the NL tools (compiled once at import) ---
+_RE_COL_IN_TABLE = re.compile(r"column\s+([A-Za-z0-9_]+)\s+in\s+table\s+([A-Za-z0-9_\.]+)", re.I)
+_RE_HOW_POPULATED = re.compile(r"how\s+is\s+([A-Za-z0-9_]+)\s+populated", re.I)
+_RE_WHERE_COLUMN = re.compile(r"(?:table\s+.*\.)?column\s+([A-Za-z0-9_]+)", re.I)
+_RE_WHERE_COLUMN_LOOSE = re.compile(r"(?:which\s+table\s+has\s+)?([A-Za-z0-9_]+)\s*(?:column)?", re.I)
+_RE_JOB_NAME = re.compile(r"(?:of|for)?\s*job\s+(.+)$")
+_RE_TRAILING_PUNCT = re.compile(r"[?.!]\s*$")
+_RE_LAST_N_DAYS = re.compile(r"last\s+(\d+)\s+days")
+# Failure intent in one scan ("reason of failure", "why failed", "failures", ... all reduce to these)
+_RE_FAILURE_INTENT = re.compile(r"fail(?:ure|ed)")
+
+@lru_cache(maxsize=1024)
+def _col_regex(col: str) -> "re.Pattern[str]":
+    """Case-insensitive whole-word matcher for a column name (memoized per name)."""
+    return re.compile(rf"\b{re.escape(col)}\b", re.IGNORECASE)
+
+# Word-trie over the supported prompt shapes: one walk over the tokenized prompt
+# instead of probing each regex in turn. "{slot}" entries capture identifiers.
+_PROMPT_SHAPES: List[Tuple[Tuple[str, ...], str]] = [
+    (("column", "{col}", "in", "table", "{table}"), "population"),
+    (("how", "is", "{col}", "populated"), "population"),
+    (("how", "is", "{col}", "populated", "in", "table", "{table}"), "population"),
+    (("how", "is", "column", "{col}", "populated"), "population"),
+    (("how", "is", "column", "{col}", "populated", "in", "table", "{table}"), "population"),
+    (("which", "table", "has", "{col}"), "where"),
+    (("which", "table", "has", "column", "{col}"), "where"),
+    (("where", "is", "{col}", "column"), "where"),
+    (("where", "is", "column", "{col}"), "where"),
+]
+_PROMPT_SLOTS = {
+    "{col}": re.compile(r"[A-Za-z0-9_]+"),
+    "{table}": re.compile(r"[A-Za-z0-9_\.]+"),
+}
+_RE_PROMPT_TOKEN = re.compile(r"[A-Za-z0-9_\.]+")
+_TRIE_LEAF = ""  # tokens are never empty, so this key cannot collide
+
+def _build_prompt_trie(shapes: List[Tuple[Tuple[str, ...], str]]) -> Dict[str, Any]:
+    root: Dict[str, Any] = {}
+    for words, intent in shapes:
+        node = root
+        for w in words:
+            node = node.setdefault(w, {})
+        node[_TRIE_LEAF] = (intent, tuple(w[1:-1] for w in words if w in _PROMPT_SLOTS))
+    return root
+
+_PROMPT_TRIE = _build_prompt_trie(_PROMPT_SHAPES)
+
+def _match_prompt_shape(prompt: str, intent: str) -> Optional[Dict[str, str]]:
+    """
+    Longest match of a known `intent` shape anywhere in the prompt.
+    Returns captured slots (original case), or None for unknown shapes.
+    """
+    # Whitespace never reaches the tokenizer, so collapsing it gives repeated
+    # prompts a stable cache key; case is kept because slots are returned as typed.
+    hit = _parse_prompt_shape(" ".join(prompt.split()), intent)
+    return dict(hit) if hit is not None else None
+
+@lru_cache(maxsize=512)
+def _parse_prompt_shape(prompt: str, intent: str) -> Optional[Tuple[Tuple[str, str], ...]]:
+    toks = [t for t in (t.strip(".") for t in _RE_PROMPT_TOKEN.findall(prompt)) if t]
+    low = [t.lower() for t in toks]
+    best: Optional[Tuple[int, Dict[str, str]]] = None
+
+    def walk(node: Dict[str, Any], i: int, start: int, captured: Tuple[str, ...]) -> None:
+        nonlocal best
+        leaf = node.get(_TRIE_LEAF)
+        if leaf and leaf[0] == intent and (best is None or i - start > best[0]):
+            best = (i - start, dict(zip(leaf[1], captured)))
+        if i >= len(toks):
+            return
+        nxt = node.get(low[i])
+        if nxt is not None:
+            walk(nxt, i + 1, start, captured)
+        for slot, rx in _PROMPT_SLOTS.items():
+            nxt = node.get(slot)
+            if nxt is not None and rx.fullmatch(toks[i]):
+                walk(nxt, i + 1, start, captured + (toks[i],))
+
+    for start in range(len(toks)):
+        if low[start] in _PROMPT_TRIE:
+            walk(_PROMPT_TRIE, start, start, ())
+    return tuple(best[1].items()) if best else None
+
 def _normalize_brackets(s: str) -> str:
     return s.replace("[", "").replace("]", "").strip()
 
@@ -556,7 +776,7 @@ def _possible_dynamic_write(defn: str, schema: str, table: str, column: str) ->
     if "sp_executesql" not in s and "exec" not in s:
         return False
     tbl_hint = table.lower() in s or f"{schema.lower()}.{table.lower()}" in s
-    col_hint = column.lower() in s
+    col_hint = _col_regex(column).search(defn) is not None
     verbs = any(k in s for k in ["update", "insert", "merge"])
     return tbl_hint and col_hint and verbs
 
@@ -564,19 +784,19 @@ def _possible_dynamic_write(defn: str, schema: str, table: str, column: str) ->
 # Candidate Discovery (reverse deps + synonyms)
 # -------------------------------------------------------------------
 def _candidate_procs_for_table(schema: str, table: str) -> List[Dict[str, Any]]:
-    with _schema_lock:
-        rev = db_schema_cache.get("rev_deps", {})
-        procs = db_schema_cache.get("procedures", {})
-        syn_by_base = db_schema_cache.get("synonyms_by_base", {})
+    snap = db_schema_cache
+    rev = snap.get("rev_deps", {})
+    procs = snap.get("procedures", {})
+    syn_by_base = snap.get("synonyms_by_base", {})
 
-        keys = set([(schema.lower(), table.lower())])
-        for syn_schema, syn_name in syn_by_base.get((schema.lower(), table.lower()), []):
-            keys.add((syn_schema.lower(), syn_name.lower()))
+    keys = set([(schema.lower(), table.lower())])
+    for syn_schema, syn_name in syn_by_base.get((schema.lower(), table.lower()), []):
+        keys.add((syn_schema.lower(), syn_name.lower()))
 
-        proc_ids = set()
-        for k in keys:
-            proc_ids |= set(rev.get(k, set()))
-        return [procs[pid] for pid in proc_ids if pid in procs]
+    proc_ids = set()
+    for k in keys:
+        proc_ids |= set(rev.get(k, set()))
+    return [procs[pid] for pid in proc_ids if pid in procs]
 
 def _scan_procs_for_writes(procs: List[Dict[str, Any]], schema: str, table: str, column: str,
                            include_definitions: str) -> List[Dict[str, Any]]:
@@ -586,7 +806,7 @@ def _scan_procs_for_writes(procs: List[Dict[str, Any]], schema: str, table: str,
         if not defn:
             continue
         dlow = defn.lower()
-        if (column.lower() not in dlow) or (table.lower() not in dlow and f"{schema.lower()}.{table.lower()}" not in dlow):
+        if (not _col_regex(column).search(defn)) or (table.lower() not in dlow and f"{schema.lower()}.{table.lower()}" not in dlow):
             if ("insert" not in dlow) and ("update" not in dlow) and ("merge" not in dlow):
                 continue
 
@@ -644,14 +864,45 @@ def _scan_procs_for_writes(procs: List[Dict[str, Any]], schema: str, table: str,
         results.append(item)
     return results
 
+class _FrozenDict(tuple):
+    """Immutable (key, value) pairs standing in for a dict inside memoized results."""
+    __slots__ = ()
+
+def _freeze(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        return _FrozenDict((k, _freeze(v)) for k, v in obj.items())
+    if isinstance(obj, list):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+def _thaw(obj: Any) -> Any:
+    if isinstance(obj, _FrozenDict):
+        return {k: _thaw(v) for k, v in obj}
+    if isinstance(obj, tuple):
+        return [_thaw(v) for v in obj]
+    return obj
+
 def _find_writing_procs(schema: str, table: str, column: str, include_definitions: str = "none") -> List[Dict[str, Any]]:
+    """
+    Writer procedures for schema.table.column as fresh, caller-owned dicts.
+    Results are memoized frozen; "full" mode is never memoized so whole bodies aren't pinned.
+    """
+    if include_definitions == "full":
+        return _scan_writing_procs(schema, table, column, include_definitions)
+    return _thaw(_writing_procs_memo(schema, table, column, include_definitions, _schema_version))
+
+@lru_cache(maxsize=4096)
+def _writing_procs_memo(schema: str, table: str, column: str, include_definitions: str, version: int) -> Tuple[Any, ...]:
+    # `version` keys the memo to one snapshot: a scan that finishes after a publish can't be served later
+    return _freeze(_scan_writing_procs(schema, table, column, include_definitions))
+
+def _scan_writing_procs(schema: str, table: str, column: str, include_definitions: str) -> List[Dict[str, Any]]:
     candidates = _candidate_procs_for_table(schema, table)
     results = _scan_procs_for_writes(candidates, schema, table, column, include_definitions)
     if results:
         return results
     # Fallback: scan all cached procedures (cap)
-    with _schema_lock:
-        procs_src = list(db_schema_cache.get("procedures", {}).values())
+    procs_src = list(db_schema_cache.get("procedures", {}).values())
     if len(procs_src) > MAX_PROC_SCAN:
         procs_src = procs_src[:MAX_PROC_SCAN]
     return _scan_procs_for_writes(procs_src, schema, table, column, include_definitions)
@@ -660,10 +911,19 @@ def _find_writing_procs(schema: str, table: str, column: str, include_definition
 # Extra writers & column metadata
 # -------------------------------------------------------------------
 def _trigger_writers(schema: str, table: str, column: str, include_definitions: str) -> List[Dict[str, Any]]:
-    writers: List[Dict[str, Any]] = []
+    """Writer triggers on schema.table for `column`; same memo/copy rules as _find_writing_procs."""
+    if include_definitions == "full":
+        return _scan_table_triggers(schema, table, column, include_definitions)
+    return _thaw(_trigger_writers_memo(schema, table, column, include_definitions, _schema_version))
+
+@lru_cache(maxsize=4096)
+def _trigger_writers_memo(schema: str, table: str, column: str, include_definitions: str, version: int) -> Tuple[Any, ...]:
+    return _freeze(_scan_table_triggers(schema, table, column, include_definitions))
+
+def _scan_table_triggers(schema: str, table: str, column: str, include_definitions: str) -> List[Dict[str, Any]]:
     tbl_id = _object_id(schema, table)
     if not tbl_id:
-        return writers
+        return []
     with metadata_cursor() as cursor:
         try:
             cursor.execute("""
@@ -678,7 +938,11 @@ def _trigger_writers(schema: str, table: str, column: str, include_definitions:
             rows = cursor.fetchall()
         except Exception:
             rows = []
+    return _scan_triggers_for_writes(rows, column, include_definitions)
 
+def _scan_triggers_for_writes(rows: List[Any], column: str, include_definitions: str) -> List[Dict[str, Any]]:
+    """rows: sys.triggers/sql_modules rows exposing object_id, trig_schema, trig_name, definition."""
+    writers: List[Dict[str, Any]] = []
     for r in rows:
         defn = (r.definition or "")
         if not defn:
@@ -757,8 +1021,9 @@ def _name_preference_score(fq_table: str) -> int:
             return score
     return 0
 
-def _table_row_count(schema: str, table: str) -> int:
-    """Approximate rowcount using sys.partitions (works for most perms)."""
+@lru_cache(maxsize=4096)
+def _table_row_count(schema: str, table: str, version: int) -> int:
+    """Approximate rowcount using sys.partitions (works for most perms); memoized per schema version."""
     with metadata_cursor() as c:
         try:
             c.execute("""
@@ -773,38 +1038,139 @@ def _table_row_count(schema: str, table: str) -> int:
         except Exception:
             return 0
 
+# Scoring is dominated by ODBC waits (GIL released), so fan out across threads.
+# Each call opens its own cursor; nothing is shared between workers.
+_SCORE_POOL = ThreadPoolExecutor(max_workers=max(1, SCORE_WORKERS), thread_name_prefix="dota-score")
+
+def _table_meta(fq: str) -> Dict[str, Any]:
+    """Load-time per-table scoring inputs; computed on the fly for tables outside the snapshot."""
+    meta = db_schema_cache.get("table_meta", {}).get(fq.lower())
+    if meta is not None:
+        return meta
+    try:
+        sch, tname = fq.split(".", 1)
+    except ValueError:
+        sch, tname = _get_table_schema_and_name(fq)
+    return {"schema": sch, "name": tname, "dbo_pref": int(sch.lower() == "dbo"),
+            "npref": _name_preference_score(fq)}
+
+# Candidates per batched scoring query: 2 params each, padded to a power of two, stays
+# well under SQL Server's 2100-parameter limit
+_BATCH_SCORE_CHUNK = 512
+
+@lru_cache(maxsize=16)
+def _object_id_list_sql(n: int) -> str:
+    return ", ".join(["OBJECT_ID(QUOTENAME(?) + '.' + QUOTENAME(?))"] * n)
+
+def _score_candidates_batched(candidates: List[str], column: str) -> List[Tuple[Tuple[int, int, int, int], str]]:
+    """
+    Same scores as _score_candidate, but rowcounts and trigger bodies for the whole
+    candidate set come back in one set-based round-trip; writer procs are scanned
+    from the cached procedure definitions.
+    """
+    metas = [_table_meta(fq) for fq in candidates]
+    pairs: List[Tuple[str, str]] = [(m["schema"], m["name"]) for m in metas]
+
+    # Pad the IN-list to a power-of-two length (repeating the last pair) so the server sees
+    # a handful of statement texts and reuses their cached plans instead of compiling one per size
+    width = max(4, 1 << (len(pairs) - 1).bit_length())
+    ids_sql = _object_id_list_sql(width)
+    params = [v for pair in pairs + pairs[-1:] * (width - len(pairs)) for v in pair]
+    rowcounts: Dict[Tuple[str, str], int] = {}
+    trig_rows: Dict[Tuple[str, str], List[Any]] = {}
+    with metadata_cursor() as c:
+        c.execute(f"""
+            SELECT SCHEMA_NAME(t.schema_id) AS sch, t.name AS tname, SUM(p.rows) AS rcount
+            FROM sys.tables t
+            JOIN sys.partitions p ON p.object_id = t.object_id AND p.index_id IN (0,1)
+            WHERE t.object_id IN ({ids_sql})
+            GROUP BY t.schema_id, t.name
+        """, *params)
+        for r in c.fetchall():
+            rowcounts[(r.sch.lower(), r.tname.lower())] = int(r.rcount or 0)
+        c.execute(f"""
+            SELECT SCHEMA_NAME(pt.schema_id) AS sch, pt.name AS tname,
+                   tr.object_id,
+                   OBJECT_SCHEMA_NAME(tr.object_id) AS trig_schema,
+                   OBJECT_NAME(tr.object_id) AS trig_name,
+                   m.definition
+            FROM sys.triggers tr
+            JOIN sys.tables pt ON pt.object_id = tr.parent_id
+            JOIN sys.sql_modules m ON m.object_id = tr.object_id
+            WHERE tr.parent_id IN ({ids_sql})
+        """, *params)
+        for r in c.fetchall():
+            trig_rows.setdefault((r.sch.lower(), r.tname.lower()), []).append(r)
+
+    scored: List[Tuple[Tuple[int, int, int, int], str]] = []
+    for fq, meta in zip(candidates, metas):
+        sch, tname = meta["schema"], meta["name"]
+        key = (sch.lower(), tname.lower())
+        writers = _find_writing_procs(sch, tname, column, include_definitions="none")
+        trigs   = _scan_triggers_for_writes(trig_rows.get(key, []), column, "none")
+        wscore  = len(writers) + len(trigs)
+        rcount  = rowcounts.get(key, 0)
+        scored.append(((wscore, meta["dbo_pref"], meta["npref"], rcount), fq))
+    return scored
+
+def _score_candidate(fq: str, column: str) -> Tuple[Tuple[int, int, int, int], str]:
+    """(writers+trigs, dbo_pref, name_pref, rowcount) for one schema.table candidate."""
+    meta = _table_meta(fq)
+    sch, tname = meta["schema"], meta["name"]
+    writers = _find_writing_procs(sch, tname, column, include_definitions="none")
+    trigs   = _trigger_writers(sch, tname, column, include_definitions="none")
+    wscore  = (len(writers) + len(trigs)) if (writers or trigs) else 0
+    # Same sys.partitions source as the batched scorer, never the load-time snapshot
+    rcount  = _table_row_count(sch, tname, _schema_version)
+    return (wscore, meta["dbo_pref"], meta["npref"], rcount), fq
+
+def _packed_score(score: Tuple[int, int, int, int]) -> int:
+    """Negated single-int sort key: wscore | dbo_pref | name_pref (15 bits) | rowcount (32 bits, clamped)."""
+    wscore, dbo_pref, npref, rcount = score
+    return -((wscore << 48) | (dbo_pref << 47) | (npref << 32) | min(max(rcount, 0), 0xFFFFFFFF))
+
 # -------------------------------------------------------------------
 # MCP Server
 # -------------------------------------------------------------------
 mcp = FastMCP("DOTA — Data Origin & Traceability Assistant")
 
-def _startup():
+def _warm_schema_cache():
     try:
         counts = load_schema_cache()
         logger.info("Schema cache loaded: %s", counts)
     except Exception as e:
         logger.warning("Schema cache load failed: %s", e)
 
+def _startup():
+    # Warm in the background so the transport starts accepting requests immediately;
+    # resources and the lineage/population tools call _ensure_schema_loaded(), so they
+    # wait for (or run) the first load instead of answering from an empty cache.
+    if SCHEMA_PREWARM_BLOCKING:
+        _warm_schema_cache()
+    else:
+        threading.Thread(target=_warm_schema_cache, name="schema-prewarm", daemon=True).start()
+
 # -------------------------------------------------------------------
 # Core Tools (connection + schema)
 # -------------------------------------------------------------------
 @mcp.tool
 def refresh_schema() -> Dict[str, object]:
     _lineage_core.cache_clear()
+    _cached_query.cache_clear()
     return {"success": True, **load_schema_cache()}
 
 @mcp.tool
 def current_connection() -> Dict[str, object]:
-    with _config_lock:
-        return {
-            "success": True,
-            "server": DB_CONFIG.get("server"),
-            "database": DB_CONFIG.get("database"),
-            "driver": DB_CONFIG.get("driver"),
-            "timeout": DB_CONFIG.get("timeout"),
-            "login_timeout": DB_CONFIG.get("login_timeout"),
-            "username": DB_CONFIG.get("username"),
-        }
+    cfg = DB_CONFIG
+    return {
+        "success": True,
+        "server": cfg.get("server"),
+        "database": cfg.get("database"),
+        "driver": cfg.get("driver"),
+        "timeout": cfg.get("timeout"),
+        "login_timeout": cfg.get("login_timeout"),
+        "username": cfg.get("username"),
+    }
 
 @mcp.tool
 def test_connection(
@@ -816,14 +1182,15 @@ def test_connection(
     timeout: Optional[int] = None,
     login_timeout: Optional[int] = None,
 ) -> Dict[str, object]:
+    cfg = DB_CONFIG
     proposed = {
         "server": server,
         "database": database,
         "username": username,
         "password": password,
-        "driver": driver or DB_CONFIG.get("driver", "{ODBC Driver 17 for SQL Server}"),
-        "timeout": int(timeout if timeout is not None else DB_CONFIG.get("timeout", 30)),
-        "login_timeout": int(login_timeout if login_timeout is not None else DB_CONFIG.get("login_timeout", 15)),
+        "driver": driver or cfg.get("driver", "{ODBC Driver 17 for SQL Server}"),
+        "timeout": int(timeout if timeout is not None else cfg.get("timeout", 30)),
+        "login_timeout": int(login_timeout if login_timeout is not None else cfg.get("login_timeout", 15)),
     }
     ok, err = _test_connection(proposed)
     return {"success": ok, "error": err} if not ok else {"success": True}
@@ -944,19 +1311,19 @@ def get_table_schema(table: str) -> Dict[str, object]:
             ORDER BY ORDINAL_POSITION
         """, schema, table_name)
         rows = cursor.fetchall()
-        columns = [{"COLUMN_NAME": r.COLUMN_NAME, "DATA_TYPE": r.DATA_TYPE, "IS_NULLABLE": r.IS_NULLABLE} for r in rows]
+        columns = [{"COLUMN_NAME": n, "DATA_TYPE": d, "IS_NULLABLE": nu} for (n, d, nu) in rows]
     return {"success": True, "schema": schema, "table": table_name, "columns": columns}
 
 @mcp.tool
-def get_column_data(table: str, select_col: str, where_col: str, value: str) -> Dict[str, object]:
+def get_column_data(table: str, select_col: str, where_col: str, value: str, top: int = MAX_COLUMN_DATA_ROWS) -> Dict[str, object]:
     (schema, table_name), _ = validate_table_column(table)
     _, select_col_real = validate_table_column(f"{schema}.{table_name}", select_col)
     _, where_col_real = validate_table_column(f"{schema}.{table_name}", where_col)
-    query = f"SELECT TOP 20 [{select_col_real}] FROM [{schema}].[{table_name}] WHERE [{where_col_real}] = ?"
+    query = f"SELECT TOP (?) [{select_col_real}] FROM [{schema}].[{table_name}] WHERE [{where_col_real}] = ?"
     with db_cursor() as cursor:
-        cursor.execute(query, value)
-        rows = cursor.fetchall()
-    return {"success": True, "schema": schema, "table": table_name, "results": [row[0] for row in rows]}
+        cursor.execute(query, min(max(0, int(top)), MAX_COLUMN_DATA_ROWS), value)
+        results = [row[0] for row in cursor]
+    return {"success": True, "schema": schema, "table": table_name, "results": results}
 
 # --- Robust object definition (qualified/unqualified; cache-cold safe) ---
 @mcp.tool
@@ -975,45 +1342,30 @@ def get_object_definition(object: str) -> Dict[str, object]:
         lookup_keys.append(obj.lower())
 
     resolved = None
-    with _schema_lock:
-        obj_cache = db_schema_cache.get("objects", {}) or {}
-        for k in lookup_keys:
-            resolved = obj_cache.get(k)
-            if resolved:
-                break
+    obj_cache = db_schema_cache.get("objects", {}) or {}
+    for k in lookup_keys:
+        resolved = obj_cache.get(k)
+        if resolved:
+            break
 
-    # If cache miss, try direct resolution paths
+    # If cache miss, resolve + fetch in one round-trip (exact qualified match first, then bare name)
     if not resolved:
         with metadata_cursor() as cursor:
-            # 1) Try the provided name as-is (qualified or bare)
-            cursor.execute("SELECT OBJECT_DEFINITION(OBJECT_ID(?)) AS definition", name)
-            row = cursor.fetchone()
-            if row and row.definition:
-                return {"success": True, "object": name, "definition": row.definition}
-
-            # 2) If bare, try to find its schema and then resolve
             cursor.execute("""
-                SELECT TOP 1 OBJECT_SCHEMA_NAME(object_id) AS s, name
+                SELECT TOP 1 SCHEMA_NAME(schema_id) AS s, name, OBJECT_DEFINITION(object_id) AS definition
                 FROM sys.objects
-                WHERE name = ?
-                ORDER BY object_id DESC
-            """, bare)
-            r = cursor.fetchone()
-            if r:
-                qname = f"{r.s}.{r.name}"
-                cursor.execute("SELECT OBJECT_DEFINITION(OBJECT_ID(?)) AS definition", qname)
-                row = cursor.fetchone()
-                if row and row.definition:
-                    return {"success": True, "object": qname, "definition": row.definition}
-
-        # Still not found
+                WHERE (SCHEMA_NAME(schema_id) + '.' + name = ? OR name = ?)
+                  AND OBJECT_DEFINITION(object_id) IS NOT NULL
+                ORDER BY CASE WHEN SCHEMA_NAME(schema_id) + '.' + name = ? THEN 0 ELSE 1 END, object_id DESC
+            """, name, bare, name)
+            row = cursor.fetchone()
+        if row:
+            return {"success": True, "object": f"{row.s}.{row.name}", "definition": row.definition}
         raise ValueError("Object not found.")
 
     # Cache hit → use the resolved qualified name
-    with metadata_cursor() as cursor:
-        cursor.execute("SELECT OBJECT_DEFINITION(OBJECT_ID(?)) AS definition", resolved)
-        row = cursor.fetchone()
-    return {"success": True, "object": resolved, "definition": row.definition if row else None}
+    rows = _cached_query("SELECT OBJECT_DEFINITION(OBJECT_ID(?)) AS definition", (resolved,))
+    return {"success": True, "object": resolved, "definition": rows[0][0] if rows else None}
 
 # -------------------------------------------------------------------
 # Jobs overview — internal impl + wrappers
@@ -1048,7 +1400,7 @@ def _get_jobs_overview_impl(
                           AND a.start_execution_date IS NOT NULL
                           AND a.stop_execution_date IS NULL
                     """, sess.session_id)
-                    running_ids = {row.job_id for row in c.fetchall()}
+                    running_ids = {jid for (jid,) in c.fetchall()}
             except Exception:
                 running_ids = set()
 
@@ -1092,8 +1444,13 @@ def _get_jobs_overview_impl(
         # Latest failure per job
         failure_map: Dict[Any, List[Dict[str, Any]]] = {}
         if failure_lookback_days and failure_lookback_days > 0:
+            # failed_at is converted server-side: no per-row round-trip
             c.execute(f"""
-                SELECT j.job_id, j.name AS job_name, h.instance_id, h.run_date, h.run_time, h.message
+                SELECT j.job_id, j.name AS job_name, h.instance_id, h.message,
+                       TRY_CONVERT(datetime,
+                           STUFF(STUFF(RIGHT('000000'+CAST(h.run_date AS VARCHAR(8)),8),5,0,'-'),8,0,'-') + ' ' +
+                           STUFF(STUFF(RIGHT('000000'+CAST(h.run_time AS VARCHAR(6)),6),3,0,':'),6,0,':')
+                       ) AS failed_at
                 FROM msdb.dbo.sysjobs j
                 JOIN msdb.dbo.sysjobhistory h ON j.job_id = h.job_id
                 WHERE h.run_status = 0
@@ -1103,63 +1460,60 @@ def _get_jobs_overview_impl(
             """, *( [cutoff] + ([job_name] if job_name else []) ))
             fails = c.fetchall()
 
-            for f in fails:
-                try:
-                    when = c.execute("""
-                        SELECT CONVERT(datetime,
-                           STUFF(STUFF(RIGHT('000000'+CAST(? AS VARCHAR(8)),8),5,0,'-'),8,0,'-') + ' ' +
-                           STUFF(STUFF(RIGHT('000000'+CAST(? AS VARCHAR(6)),6),3,0,':'),6,0,':')
-                        )
-                    """, f.run_date, f.run_time).fetchone()[0]
-                except Exception:
-                    when = None
-                failure_map.setdefault(f.job_id, []).append({
-                    "job": f.job_name,
+            for f_job_id, f_job_name, _instance_id, f_message, when in fails:
+                failure_map.setdefault(f_job_id, []).append({
+                    "job": f_job_name,
                     "failed_at": when.isoformat() if when else None,
-                    "summary_message": f.message,
+                    "summary_message": f_message,
                     "step_id": None,
                     "step_name": None,
                     "step_message": None,
                 })
 
-            # Attach best-effort failing step per job
-            for job_id in list(failure_map.keys()):
+            # Attach best-effort failing step per job (latest failed step of every job, one query)
+            if failure_map:
                 try:
-                    c.execute("""
-                        SELECT TOP 1 h.step_id, s.step_name, h.message AS step_message
-                        FROM msdb.dbo.sysjobhistory h
-                        LEFT JOIN msdb.dbo.sysjobsteps s
-                               ON s.job_id = h.job_id AND s.step_id = h.step_id
-                        WHERE h.job_id = ?
-                          AND h.run_status = 0
-                          AND h.step_id > 0
-                        ORDER BY h.instance_id DESC, h.step_id DESC
-                    """, job_id)
-                    fr = c.fetchone()
-                    if fr and failure_map[job_id]:
-                        failure_map[job_id][0]["step_id"] = fr.step_id
-                        failure_map[job_id][0]["step_name"] = fr.step_name
-                        failure_map[job_id][0]["step_message"] = fr.step_message
+                    c.execute(f"""
+                        SELECT job_id, step_id, step_name, step_message
+                        FROM (
+                            SELECT h.job_id, h.step_id, s.step_name, h.message AS step_message,
+                                   ROW_NUMBER() OVER (PARTITION BY h.job_id
+                                                      ORDER BY h.instance_id DESC, h.step_id DESC) AS rn
+                            FROM msdb.dbo.sysjobhistory h
+                            JOIN msdb.dbo.sysjobs j ON j.job_id = h.job_id
+                            LEFT JOIN msdb.dbo.sysjobsteps s
+                                   ON s.job_id = h.job_id AND s.step_id = h.step_id
+                            WHERE h.run_status = 0
+                              AND h.step_id > 0
+                              {('AND j.name = ?' if job_name else '')}
+                        ) x
+                        WHERE rn = 1
+                    """, *([job_name] if job_name else []))
+                    for fr in c.fetchall():
+                        entries = failure_map.get(fr.job_id)
+                        if entries:
+                            entries[0]["step_id"] = fr.step_id
+                            entries[0]["step_name"] = fr.step_name
+                            entries[0]["step_message"] = fr.step_message
                 except Exception:
-                    continue
+                    pass
 
-    items = []
-    for r in jobs:
-        jid = r.job_id
+    keyed: List[Tuple[str, Dict[str, Any]]] = []   # (job_name_lower, entry)
+    for jid, name, last_status, last_run_dt in jobs:
         entry = {
-            "job": r.name,
-            "status": r.last_status or "Unknown",
-            "last_run": r.last_run_dt.isoformat() if getattr(r, "last_run_dt", None) else None,
+            "job": name,
+            "status": last_status or "Unknown",
+            "last_run": last_run_dt.isoformat() if last_run_dt else None,
             "running": (jid in running_ids),
             "last_failure": None
         }
-        fl = failure_map.get(jid, [])
+        fl = failure_map.get(jid)
         if fl:
-            fl.sort(key=lambda x: (x["failed_at"] or ""), reverse=True)
-            entry["last_failure"] = fl[0]
-        items.append(entry)
+            entry["last_failure"] = fl[0] if len(fl) == 1 else max(fl, key=lambda x: x["failed_at"] or "")
+        keyed.append((name.lower(), entry))
 
-    items.sort(key=lambda x: x["job"].lower())
+    keyed.sort(key=itemgetter(0))
+    items = [entry for _, entry in keyed]
     if limit is not None:
         items = items[:int(limit)]
 
@@ -1188,15 +1542,15 @@ def ask_jobs(prompt: str,
     """
     p = prompt.strip().lower()
     job_name = None
-    m = re.search(r"(?:of|for)?\s*job\s+(.+)$", p)
+    m = _RE_JOB_NAME.search(p)
     if m:
-        job_name = re.sub(r"[?.!]\s*$", "", prompt[m.start(1):].strip())
+        job_name = _RE_TRAILING_PUNCT.sub("", prompt[m.start(1):].strip())
 
-    m2 = re.search(r"last\s+(\d+)\s+days", p)
+    m2 = _RE_LAST_N_DAYS.search(p)
     if m2:
         failure_lookback_days = int(m2.group(1))
 
-    wants_failure = any(k in p for k in ["reason of failure", "why failed", "failures", "failed", "failure"])
+    wants_failure = _RE_FAILURE_INTENT.search(p) is not None
     res = _get_jobs_overview_impl(
         job_name=job_name,
         include_running=include_running,
@@ -1229,6 +1583,7 @@ def ask_jobs(prompt: str,
 # -------------------------------------------------------------------
 # Lineage core — NO Graphviz, returns logic graph
 # -------------------------------------------------------------------
+@lru_cache(maxsize=64)
 def _effective_depth(max_depth: Optional[int]) -> int:
     depth = DEFAULT_LINEAGE_MAX_DEPTH if (max_depth is None) else int(max_depth)
     if depth > MAX_ALLOWED_LINEAGE_DEPTH:
@@ -1239,14 +1594,22 @@ def _effective_depth(max_depth: Optional[int]) -> int:
 
 @lru_cache(maxsize=512)
 def _lineage_core(server: str, database: str, table: str, column: str,
-                  depth: int, defs_mode: str) -> Dict[str, Any]:
+                  depth: int, defs_mode: str, version: int) -> Dict[str, Any]:
+    # `version` (the schema version) only keys the memo: results from an older snapshot never hit
     schema, table_name = _get_table_schema_and_name(table)
     target_node = f"{schema}.{table_name}:{column}"
 
     nodes: Dict[str, Dict[str, Any]] = {}
     edges: List[Dict[str, Any]] = []
+    seen_edges: set = set()
     mappings: List[Dict[str, Any]] = []
 
+    def _add_edge(src: str, tgt: str, rel: str) -> None:
+        k = (src, tgt, rel)
+        if k not in seen_edges:
+            seen_edges.add(k)
+            edges.append({"source": src, "target": tgt, "relation": rel})
+
     # target column node
     nodes[target_node] = {"type": "column", "schema": schema, "name": table_name, "column": column}
 
@@ -1259,7 +1622,7 @@ def _lineage_core(server: str, database: str, table: str, column: str,
     for proc in writers:
         proc_node = f"{proc['schema']}.{proc['name']}"
         nodes[proc_node] = {"type": "procedure", "schema": proc["schema"], "name": proc["name"]}
-        edges.append({"source": proc_node, "target": target_node, "relation": "writes"})
+        _add_edge(proc_node, target_node, "writes")
         for e in proc.get("expressions", []):
             mappings.append({
                 "target": {"schema": schema, "table": table_name, "column": column},
@@ -1272,7 +1635,7 @@ def _lineage_core(server: str, database: str, table: str, column: str,
     for trg in trig_writers:
         trg_node = f"{trg['schema']}.{trg['name']}"
         nodes[trg_node] = {"type": "trigger", "schema": trg["schema"], "name": trg["name"]}
-        edges.append({"source": trg_node, "target": target_node, "relation": "writes"})
+        _add_edge(trg_node, target_node, "writes")
         for e in trg.get("expressions", []):
             mappings.append({
                 "target": {"schema": schema, "table": table_name, "column": column},
@@ -1295,48 +1658,36 @@ def _lineage_core(server: str, database: str, table: str, column: str,
             continue
         seen.add(obj_id)
 
-        with metadata_cursor() as cursor:
-            try:
-                cursor.execute("""
-                    SELECT
-                        d.referenced_id,
-                        OBJECT_SCHEMA_NAME(d.referenced_id) AS ref_schema,
-                        OBJECT_NAME(d.referenced_id) AS ref_name,
-                        o.[type] AS ref_type
-                    FROM sys.sql_expression_dependencies d
-                    LEFT JOIN sys.objects o ON o.object_id = d.referenced_id
-                    WHERE d.referencing_id = ?
-                """, obj_id)
-                deps = cursor.fetchall()
-            except Exception:
-                deps = []
+        try:
+            deps = _cached_query("""
+                SELECT
+                    d.referenced_id,
+                    OBJECT_SCHEMA_NAME(d.referenced_id) AS ref_schema,
+                    OBJECT_NAME(d.referenced_id) AS ref_name,
+                    o.[type] AS ref_type
+                FROM sys.sql_expression_dependencies d
+                LEFT JOIN sys.objects o ON o.object_id = d.referenced_id
+                WHERE d.referencing_id = ?
+            """, (obj_id,))
+        except Exception:
+            deps = ()
 
-        for dep in deps:
-            if not dep.ref_name:
+        for _ref_id, ref_schema, ref_name, ref_type in deps:
+            if not ref_name:
                 continue
-            node_id = f"{dep.ref_schema}.{dep.ref_name}"
+            node_id = f"{ref_schema}.{ref_name}"
             if node_id not in nodes:
-                nodes[node_id] = {"type": dep.ref_type, "schema": dep.ref_schema, "name": dep.ref_name}
-            edges.append({"source": node_id, "target": via_proc_node, "relation": "feeds"})
-            if dep.ref_type == 'P':
-                ref_oid = _object_id(dep.ref_schema, dep.ref_name)
+                nodes[node_id] = {"type": ref_type, "schema": ref_schema, "name": ref_name}
+            _add_edge(node_id, via_proc_node, "feeds")
+            if ref_type == 'P':
+                ref_oid = _object_id(ref_schema, ref_name)
                 if ref_oid:
                     queue.append((ref_oid, d + 1, node_id))
 
-    # dedupe edges
-    uniq = []
-    seen_e = set()
-    for e in edges:
-        k = (e["source"], e["target"], e.get("relation", ""))
-        if k in seen_e:
-            continue
-        seen_e.add(k)
-        uniq.append(e)
-
     return {
         "success": True,
         "target": {"schema": schema, "table": table_name, "column": column},
-        "graph": {"nodes": nodes, "edges": uniq},
+        "graph": {"nodes": nodes, "edges": edges},
         "candidate_population_expressions": mappings,
         "writer_procedures": writers,
         "writer_triggers": trig_writers,
@@ -1353,11 +1704,13 @@ def _get_column_lineage_impl(
     if include_definitions not in ("none", "excerpt", "full"):
         raise ValueError("include_definitions must be: none | excerpt | full")
     depth = _effective_depth(max_depth)
+    # Writer scans read the cached procedures; don't answer (and memoize) from an empty cache
+    _ensure_schema_loaded()
 
-    with _config_lock:
-        server = str(DB_CONFIG.get("server") or "")
-        database = str(DB_CONFIG.get("database") or "")
-    res = _lineage_core(server, database, table, column, depth, include_definitions)
+    cfg = DB_CONFIG
+    server = str(cfg.get("server") or "")
+    database = str(cfg.get("database") or "")
+    res = _lineage_core(server, database, table, column, depth, include_definitions, _schema_version)
 
     provenance = {"database": database} if EXPOSE_DATABASE_ONLY else None
 
@@ -1409,18 +1762,13 @@ def _get_column_population_impl(
             "column": meta.get("column"),
         })
 
-    seen = set()
+    # graph edges are already unique (deduped on insertion in _lineage_core)
     topo_edges: List[Dict[str, Any]] = []
     for e in gedges:
-        src, dst = e["source"], e["target"]
         rel = e.get("relation", "")
-        k = (src, dst, rel)
-        if k in seen:
-            continue
-        seen.add(k)
         topo_edges.append({
-            "from": src,
-            "to": dst,
+            "from": e["source"],
+            "to": e["target"],
             "relation": rel,
             "label": "writes" if rel == "writes" else ""
         })
@@ -1457,44 +1805,49 @@ def _get_column_population_impl(
 def _find_tables_with_column_impl(
     column: str,
     case_insensitive: bool = True,
-    include_views: bool = False
+    include_views: bool = False,
+    limit: Optional[int] = None
 ) -> Dict[str, object]:
+    global db_schema_cache
     col_key = column.lower() if case_insensitive else column
-
-    # 1) Try cache
-    with _schema_lock:
-        col_index = db_schema_cache.get("columns_index") or {}
-        hits = list(col_index.get(col_key, []))
-
-    # 2) If cache empty or not found, query catalog and warm cache
-    if not hits:
+    if limit is not None:
+        limit = max(0, int(limit))   # TOP (?) rejects negatives
+
+    # 1) Try cache. The index is built for every base-table column at load time,
+    #    so once a load has published a miss is authoritative for case-insensitive lookups.
+    col_index = db_schema_cache.get("columns_index") or {}
+    index_answers = _schema_loaded and case_insensitive and not include_views
+    hits = list(col_index.get(col_key, [])) if not include_views else []
+    if hits and limit is not None:
+        hits = hits[:limit]
+
+    # 2) Cache cold (or a lookup the index can't answer): query the catalog views
+    #    directly (sys.* avoids the INFORMATION_SCHEMA view layering) and warm cache
+    if not hits and not index_answers:
+        top_sql = "TOP (?) " if limit is not None else ""
+        obj_types = "('U', 'V')" if include_views else "('U')"
+        name_pred = "c.name COLLATE Latin1_General_CI_AS = ?" if case_insensitive else "c.name = ?"
+        params: List[Any] = [int(limit)] if limit is not None else []
+        params.append(column)
         with metadata_cursor() as c:
-            if include_views:
-                c.execute("""
-                    SELECT TABLE_SCHEMA, TABLE_NAME
-                    FROM INFORMATION_SCHEMA.COLUMNS
-                    WHERE {0} = ?
-                    ORDER BY TABLE_SCHEMA, TABLE_NAME
-                """.format("LOWER(COLUMN_NAME)" if case_insensitive else "COLUMN_NAME"),
-                col_key if case_insensitive else column)
-            else:
-                c.execute("""
-                    SELECT C.TABLE_SCHEMA, C.TABLE_NAME
-                    FROM INFORMATION_SCHEMA.COLUMNS C
-                    JOIN INFORMATION_SCHEMA.TABLES T
-                      ON T.TABLE_SCHEMA = C.TABLE_SCHEMA AND T.TABLE_NAME = C.TABLE_NAME
-                    WHERE T.TABLE_TYPE = 'BASE TABLE'
-                      AND {0} = ?
-                    ORDER BY C.TABLE_SCHEMA, C.TABLE_NAME
-                """.format("LOWER(COLUMN_NAME)" if case_insensitive else "COLUMN_NAME"),
-                col_key if case_insensitive else column)
-            rows = c.fetchall()
-            hits = [f"{r.TABLE_SCHEMA}.{r.TABLE_NAME}" for r in rows]
-
-        with _schema_lock:
-            db_schema_cache.setdefault("columns_index", {}).setdefault(col_key, [])
-            cur = set(db_schema_cache["columns_index"][col_key])
-            db_schema_cache["columns_index"][col_key] = sorted(cur | set(hits))
+            c.execute(f"""
+                SELECT {top_sql}SCHEMA_NAME(o.schema_id) AS sch, o.name
+                FROM sys.columns c
+                JOIN sys.objects o ON o.object_id = c.object_id
+                WHERE o.[type] IN {obj_types}
+                  AND {name_pred}
+                ORDER BY sch, o.name
+            """, *params)
+            hits = [f"{sch}.{name}" for (sch, name) in c.fetchall()]
+
+        # Only a complete base-table answer may be merged into the index; copy-on-write,
+        # like a load: build a new index and rebind a new snapshot, never mutate the published one
+        if hits and limit is None and case_insensitive and not include_views:
+            with _schema_lock:
+                snap = db_schema_cache
+                idx = dict(snap.get("columns_index") or {})
+                idx[col_key] = sorted(set(idx.get(col_key, [])) | set(hits))
+                db_schema_cache = {**snap, "columns_index": idx}
 
     return {"success": True, "column": column, "tables": hits, "count": len(hits)}
 
@@ -1525,9 +1878,10 @@ def get_column_population(
 def find_tables_with_column(
     column: str,
     case_insensitive: bool = True,
-    include_views: bool = False
+    include_views: bool = False,
+    limit: Optional[int] = None
 ) -> Dict[str, object]:
-    return _find_tables_with_column_impl(column, case_insensitive, include_views)
+    return _find_tables_with_column_impl(column, case_insensitive, include_views, limit)
 
 @mcp.tool
 def ask_where_column(prompt: str) -> Dict[str, object]:
@@ -1535,12 +1889,16 @@ def ask_where_column(prompt: str) -> Dict[str, object]:
     NL: "which table has column salary?", "where is Salary column?", etc.
     """
     p = prompt.strip()
-    m = re.search(r"(?:table\s+.*\.)?column\s+([A-Za-z0-9_]+)", p, re.I)
-    if not m:
-        m = re.search(r"(?:which\s+table\s+has\s+)?([A-Za-z0-9_]+)\s*(?:column)?", p, re.I)
-    if not m:
-        return {"success": False, "message": "Please specify the column name, e.g., 'which table has column Salary'."}
-    col = m.group(1)
+    slots = _match_prompt_shape(p, "where")
+    if slots:
+        col = slots["col"]
+    else:
+        m = _RE_WHERE_COLUMN.search(p)
+        if not m:
+            m = _RE_WHERE_COLUMN_LOOSE.search(p)
+        if not m:
+            return {"success": False, "message": "Please specify the column name, e.g., 'which table has column Salary'."}
+        col = m.group(1)
     return _find_tables_with_column_impl(column=col, case_insensitive=True, include_views=False)
 
 @mcp.tool
@@ -1559,25 +1917,37 @@ def ask_column_population(
     """
     if include_definitions not in ("none", "excerpt", "full"):
         return {"success": False, "message": "include_definitions must be: none | excerpt | full"}
+    # Candidate scoring counts cached writer procs; an unloaded cache would score every table 0
+    _ensure_schema_loaded()
+
+    col: Optional[str] = None
+    table: Optional[str] = None
+    slots = _match_prompt_shape(prompt, "population")
+    if slots:
+        col, table = slots["col"], slots.get("table")
+    else:
+        # Unknown shape: fall back to the free-form regexes
+        m = _RE_COL_IN_TABLE.search(prompt)
+        if m:
+            col, table = m.group(1), m.group(2)
+        else:
+            m = _RE_HOW_POPULATED.search(prompt)
+            if m:
+                col = m.group(1)
 
     # Direct: "column <col> in table <schema.table>"
-    m = re.search(r"column\s+([A-Za-z0-9_]+)\s+in\s+table\s+([A-Za-z0-9_\.]+)", prompt, re.I)
-    if m:
-        col, table = m.group(1), m.group(2)
+    if col and table:
         return _get_column_population_impl(table=table, column=col, max_depth=max_depth, include_definitions=include_definitions)
 
     # Generic: "how is <col> populated"
-    m = re.search(r"how\s+is\s+([A-Za-z0-9_]+)\s+populated", prompt, re.I)
-    if not m:
+    if not col:
         return {"success": False, "message": "Could not parse. Try: 'how is <column> populated' or 'how is column <col> populated in table <schema.table>'."}
-    col = m.group(1)
     col_key = col.lower()
 
-    # Ensure cache has candidates; if not, warm from INFORMATION_SCHEMA
-    with _schema_lock:
-        col_index = db_schema_cache.get("columns_index") or {}
-        all_candidates = list(col_index.get(col_key, []))
-    if not all_candidates:
+    # Candidates come from the load-time index; only a cold cache goes to the catalog
+    col_index = db_schema_cache.get("columns_index") or {}
+    all_candidates = list(col_index.get(col_key, []))
+    if not all_candidates and not _schema_loaded:
         warm = _find_tables_with_column_impl(column=col, case_insensitive=True, include_views=False)
         all_candidates = warm.get("tables", [])
 
@@ -1595,22 +1965,32 @@ def ask_column_population(
     if len(all_candidates) == 1:
         return _get_column_population_impl(table=all_candidates[0], column=col, max_depth=max_depth, include_definitions=include_definitions)
 
-    # Score multi-candidates: (writers+trigs, dbo_pref, name_pref, rowcount)
-    scored: List[Tuple[Tuple[int,int,int,int], str]] = []
-    for fq in all_candidates:
-        try:
-            sch, tname = fq.split(".", 1)
-        except ValueError:
-            sch, tname = _get_table_schema_and_name(fq)
-        writers = _find_writing_procs(sch, tname, col, include_definitions="none")
-        trigs   = _trigger_writers(sch, tname, col, include_definitions="none")
-        wscore  = (len(writers) + len(trigs)) if (writers or trigs) else 0
-        dbo_pref = 1 if sch.lower() == "dbo" else 0
-        npref   = _name_preference_score(fq)
-        rcount  = _table_row_count(sch, tname)
-        scored.append(((wscore, dbo_pref, npref, rcount), fq))
-
-    scored.sort(key=lambda x: (-x[0][0], -x[0][1], -x[0][2], -x[0][3], x[1].lower()))
+    # Score multi-candidates: (writers+trigs, dbo_pref, name_pref, rowcount).
+    # The set-based scorer is cheap, so every candidate is scored there.
+    total = len(all_candidates)
+    truncated: Dict[str, object] = {}
+    try:
+        scored: List[Tuple[Tuple[int,int,int,int], str]] = []
+        for i in range(0, total, _BATCH_SCORE_CHUNK):
+            scored.extend(_score_candidates_batched(all_candidates[i:i + _BATCH_SCORE_CHUNK], col))
+    except Exception as e:
+        # e.g. catalog permissions differ; fall back to per-candidate scoring. That path is
+        # capped, ordered by the free load-time keys so the cap keeps the likely winners.
+        logger.debug("Batched scoring failed, falling back per-candidate: %s", e)
+        candidates = all_candidates
+        if total > MAX_SCORE_CANDIDATES:
+            metas = {fq: _table_meta(fq) for fq in all_candidates}
+            candidates = sorted(
+                all_candidates,
+                key=lambda fq: (-metas[fq]["dbo_pref"], -metas[fq]["npref"], fq.lower()),
+            )[:MAX_SCORE_CANDIDATES]
+            truncated = {"candidates_truncated": True, "candidates_total": total}
+        futures = [_SCORE_POOL.submit(_score_candidate, fq, col) for fq in candidates]
+        scored = [f.result() for f in as_completed(futures)]
+
+    # Decorate once (packed score, lowered name) so the sort compares C-level keys only
+    ranked = sorted(((_packed_score(s), fq.lower(), s, fq) for s, fq in scored), key=itemgetter(0, 1))
+    scored = [(s, fq) for _, _, s, fq in ranked]
     top_score, top_fq = scored[0][0], scored[0][1]
     second_score = scored[1][0] if len(scored) > 1 else None
 
@@ -1619,6 +1999,7 @@ def ask_column_population(
         res = _get_column_population_impl(table=top_fq, column=col, max_depth=max_depth, include_definitions=include_definitions)
         res["auto_selected"] = top_fq
         res["alternatives"] = [fq for _, fq in scored[1:4]]
+        res.update(truncated)
         return res
 
     # Dead tie: pick first, but include alternatives + note
@@ -1627,6 +2008,7 @@ def ask_column_population(
         res["auto_selected"] = top_fq
         res["alternatives"] = [fq for _, fq in scored[1:4]]
         res["tie_break_note"] = "Multiple tables tied; auto-selected the first by name. Alternatives included."
+        res.update(truncated)
         return res
 
     # Or return ranked list for the UI to present quick choices
@@ -1638,26 +2020,29 @@ def ask_column_population(
         "success": False,
         "message": f"Column '{col}' exists in multiple tables. Select one to continue.",
         "candidates_ranked": suggestions,
-        "hint": f"You can also specify: 'how is column {col} populated in table <schema.table>'."
+        "hint": f"You can also specify: 'how is column {col} populated in table <schema.table>'.",
+        **truncated,
     }
 
 # -------------------------------------------------------------------
 # Resources
 # -------------------------------------------------------------------
-@mcp.resource(
-    uri="sql://index",
-    description="Overview of SQL metadata: counts and quick links to tables/jobs.",
-    mime_type="text/markdown",
-)
-def resource_index() -> str:
-    if not db_schema_cache["tables"] and not db_schema_cache["jobs"]:
-        try:
-            load_schema_cache()
-        except Exception:
-            pass
-    with _schema_lock:
-        tcount = len(db_schema_cache["tables"])
-        jcount = len(db_schema_cache["jobs"])
+_resource_memo: Dict[str, Tuple[int, str]] = {}   # {resource: (schema_version, markdown)}
+
+def _memo_resource(name: str, render) -> str:
+    """Return the rendered markdown for `name`, rebuilding only when the schema version moved."""
+    v = _schema_version
+    hit = _resource_memo.get(name)
+    if hit and hit[0] == v:
+        return hit[1]
+    text = render()
+    _resource_memo[name] = (v, text)
+    return text
+
+def _render_index() -> str:
+    snap = db_schema_cache
+    tcount = len(snap["tables"])
+    jcount = len(snap["jobs"])
     return (
         "# SQL Metadata Index\n\n"
         f"- **Tables:** {tcount} (see `sql://tables`)\n"
@@ -1665,19 +2050,8 @@ def resource_index() -> str:
         "Load `sql://tables` or `sql://jobs` to see full lists."
     )
 
-@mcp.resource(
-    uri="sql://tables",
-    description="Markdown list of all base tables discovered.",
-    mime_type="text/markdown",
-)
-def resource_tables() -> str:
-    if not db_schema_cache["tables"]:
-        try:
-            load_schema_cache()
-        except Exception:
-            pass
-    with _schema_lock:
-        tables = sorted(db_schema_cache["tables"].values())
+def _render_tables() -> str:
+    tables = sorted(db_schema_cache["tables"].values())
     if not tables:
         return "# Tables\n\n_No tables found in cache. Run the `refresh_schema` tool and try again_."
     lines = ["# Tables", "", f"Total: **{len(tables)}**", ""]
@@ -1685,19 +2059,8 @@ def resource_tables() -> str:
         lines.append(f"- {t}")
     return "\n".join(lines)
 
-@mcp.resource(
-    uri="sql://jobs",
-    description="Markdown list of all SQL Agent jobs discovered.",
-    mime_type="text/markdown",
-)
-def resource_jobs() -> str:
-    if not db_schema_cache["jobs"]:
-        try:
-            load_schema_cache()
-        except Exception:
-            pass
-    with _schema_lock:
-        jobs = sorted(db_schema_cache["jobs"].values())
+def _render_jobs() -> str:
+    jobs = sorted(db_schema_cache["jobs"].values())
     if not jobs:
         return "# Jobs\n\n_No jobs found in cache. Run the `refresh_schema` tool and try again_."
     lines = ["# Jobs", "", f"Total: **{len(jobs)}**", ""]
@@ -1705,6 +2068,33 @@ def resource_jobs() -> str:
         lines.append(f"- {j}")
     return "\n".join(lines)
 
+@mcp.resource(
+    uri="sql://index",
+    description="Overview of SQL metadata: counts and quick links to tables/jobs.",
+    mime_type="text/markdown",
+)
+def resource_index() -> str:
+    _ensure_schema_loaded()
+    return _memo_resource("index", _render_index)
+
+@mcp.resource(
+    uri="sql://tables",
+    description="Markdown list of all base tables discovered.",
+    mime_type="text/markdown",
+)
+def resource_tables() -> str:
+    _ensure_schema_loaded()
+    return _memo_resource("tables", _render_tables)
+
+@mcp.resource(
+    uri="sql://jobs",
+    description="Markdown list of all SQL Agent jobs discovered.",
+    mime_type="text/markdown",
+)
+def resource_jobs() -> str:
+    _ensure_schema_loaded()
+    return _memo_resource("jobs", _render_jobs)
+
 # -------------------------------------------------------------------
 # Entry
 # -------------------------------------------------------------------
@@ -11,11 +11,21 @@ Requires:
 """
 
 import os
+import re
+import json
 import logging
 import threading
-from typing import Dict, Optional, Tuple
+import time
+from queue import LifoQueue, Empty, Full
+from typing import Callable, Dict, List, Optional, Tuple
 from contextlib import contextmanager
+from functools import lru_cache, partial, wraps
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import groupby
+from operator import attrgetter
 
+import anyio
 from dotenv import load_dotenv
 import pyodbc
 from fastmcp import FastMCP
@@ -41,83 +51,389 @@ DB_CONFIG: Dict[str, object] = {
     "timeout": int(os.getenv("DB_TIMEOUT", "30")),
     "login_timeout": int(os.getenv("DB_LOGIN_TIMEOUT", "15")),
 }
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_POOL_PING_IDLE = float(os.getenv("DB_POOL_PING_IDLE", "60"))  # seconds idle before a liveness ping
+DB_POOL_WARM = min(int(os.getenv("DB_POOL_WARM", "4")), DB_POOL_SIZE)  # connections opened at startup
+RESOURCE_TTL = float(os.getenv("RESOURCE_TTL", "60"))            # seconds a per-column/job report is reused
+POPULATION_LIMIT = int(os.getenv("POPULATION_LIMIT", "100"))     # max procedures per population lookup
+SNAPSHOT_DIR = os.getenv("SCHEMA_SNAPSHOT_DIR", os.path.join(os.path.expanduser("~"), ".cache", "sql-mcp"))
+SNAPSHOT_MAX_AGE = float(os.getenv("SCHEMA_SNAPSHOT_MAX_AGE_HOURS", "24")) * 3600
 
 # -----------------------
-# In-memory Schema Cache (thread-safe)
+# In-memory Schema Cache (copy-on-write)
 # -----------------------
+# Loads publish a fresh dict by rebinding db_schema_cache; readers grab the current
+# reference without locking. _schema_lock only orders the publish and on-demand additions.
 _schema_lock = threading.RLock()
-db_schema_cache = {"tables": {}, "columns": {}, "objects": {}, "jobs": {}}
+db_schema_cache = {"tables": {}, "columns": {}, "column_types": {}, "objects": {}, "jobs": {}, "ambiguous_tables": {}}
+
+# In-flight background load; concurrent cold readers wait on the same Future
+_load_lock = threading.Lock()
+_load_future: Optional[Future] = None
+_published = False  # set by the first publish (snapshot or database); an empty map after that is a real answer
 
 # -----------------------
 # DB Helpers
 # -----------------------
+# DB_CONFIG is fixed for the life of the process, so the connection string is built once
+_missing = [k for k in ("server", "database", "username", "password") if not DB_CONFIG[k]]
+if _missing:
+    logger.warning("DB config incomplete, missing: %s", ", ".join(_missing))
+
+_CONN_STR = (
+    f"DRIVER={DB_CONFIG['driver']};"
+    f"SERVER={DB_CONFIG['server']};"
+    f"DATABASE={DB_CONFIG['database']};"
+    f"UID={DB_CONFIG['username']};"
+    f"PWD={DB_CONFIG['password']};"
+    f"Timeout={DB_CONFIG['timeout']};"
+    f"LoginTimeout={DB_CONFIG['login_timeout']}"
+)
+
 def get_db_connection():
-    conn_str = (
-        f"DRIVER={DB_CONFIG['driver']};"
-        f"SERVER={DB_CONFIG['server']};"
-        f"DATABASE={DB_CONFIG['database']};"
-        f"UID={DB_CONFIG['username']};"
-        f"PWD={DB_CONFIG['password']};"
-        f"Timeout={DB_CONFIG['timeout']};"
-        f"LoginTimeout={DB_CONFIG['login_timeout']}"
-    )
-    return pyodbc.connect(conn_str, autocommit=True)
+    return pyodbc.connect(_CONN_STR, autocommit=True)
+
+# Idle connections as (conn, last_used); LIFO keeps the warmest ones in play
+_POOL: "LifoQueue[Tuple[pyodbc.Connection, float]]" = LifoQueue(maxsize=DB_POOL_SIZE)
+
+def _close_quietly(conn) -> None:
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+def _checkout():
+    while True:
+        try:
+            conn, last_used = _POOL.get_nowait()
+        except Empty:
+            return get_db_connection()
+        if time.monotonic() - last_used <= DB_POOL_PING_IDLE:
+            return conn
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return conn
+        except pyodbc.Error:
+            _close_quietly(conn)
+
+def warm_pool(n: int = DB_POOL_WARM) -> int:
+    """Open up to n connections in parallel and park them in the pool; returns how many were added."""
+    if n <= 0:
+        return 0
+    added = 0
+    with ThreadPoolExecutor(max_workers=n, thread_name_prefix="pool-warm") as ex:
+        for fut in [ex.submit(get_db_connection) for _ in range(n)]:
+            try:
+                conn = fut.result()
+            except pyodbc.Error as e:
+                logger.debug("Pool warm-up connection failed: %s", e)
+                continue
+            try:
+                _POOL.put_nowait((conn, time.monotonic()))
+                added += 1
+            except Full:
+                _close_quietly(conn)
+    return added
 
 @contextmanager
 def db_cursor():
-    conn = get_db_connection()
+    conn = _checkout()
+    cursor = conn.cursor()
+    healthy = True
     try:
-        yield conn.cursor()
+        yield cursor
+    except pyodbc.Error:
+        # The connection may be broken; don't hand it to the next caller
+        healthy = False
+        raise
     finally:
-        conn.close()
+        try:
+            cursor.close()
+        except pyodbc.Error:
+            healthy = False
+        if healthy:
+            try:
+                _POOL.put_nowait((conn, time.monotonic()))
+            except Full:
+                healthy = False
+        if not healthy:
+            _close_quietly(conn)
 
 # -----------------------
 # Cache Loader
 # -----------------------
-def load_schema_cache() -> Dict[str, int]:
-    with _schema_lock:
-        with db_cursor() as cursor:
-            cursor.execute("SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE = 'BASE TABLE'")
-            tables = [row.TABLE_NAME for row in cursor.fetchall()]
-            db_schema_cache["tables"] = {t.lower(): t for t in tables}
+# index/tables/jobs resources only change on a load, so their markdown is rendered at publish time
+def _index_md(tables: Dict[str, str], jobs: Dict[str, str]) -> str:
+    return (
+        "# SQL Metadata Index\n\n"
+        f"- **Tables:** {len(tables)} (see `sql://tables`)\n"
+        f"- **Jobs:** {len(jobs)} (see `sql://jobs`)\n\n"
+        "Load `sql://tables` or `sql://jobs` to see full lists."
+    )
 
-            db_schema_cache["columns"] = {}
-            for table in tables:
-                cursor.execute("SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME = ?", table)
-                cols = [row.COLUMN_NAME for row in cursor.fetchall()]
-                db_schema_cache["columns"][table.lower()] = {c.lower(): c for c in cols}
+def _tables_md(tables: Dict[str, str]) -> str:
+    if not tables:
+        return "# Tables\n\n_No tables found in cache. Run the `refresh_schema` tool and try again_."
+    return f"# Tables\n\nTotal: **{len(tables)}**\n\n" + "\n".join(f"- {t}" for t in sorted(tables.values()))
 
-            cursor.execute(
-                "SELECT ROUTINE_NAME AS obj FROM INFORMATION_SCHEMA.ROUTINES "
-                "UNION SELECT TABLE_NAME AS obj FROM INFORMATION_SCHEMA.VIEWS"
-            )
-            db_schema_cache["objects"] = {row.obj.lower(): row.obj for row in cursor.fetchall()}
+def _jobs_md(jobs: Dict[str, str]) -> str:
+    if not jobs:
+        return "# Jobs\n\n_No jobs found in cache. Run the `refresh_schema` tool and try again_."
+    return f"# Jobs\n\nTotal: **{len(jobs)}**\n\n" + "\n".join(f"- {j}" for j in sorted(jobs.values()))
 
-            try:
-                cursor.execute("SELECT name FROM msdb.dbo.sysjobs")
-                db_schema_cache["jobs"] = {row.name.lower(): row.name for row in cursor.fetchall()}
-            except Exception:
-                db_schema_cache["jobs"] = {}
+def _publish(tables, columns, column_types, objects, jobs, ambiguous_tables) -> None:
+    """Swap in a new snapshot, with the static resource bodies rendered alongside it."""
+    global db_schema_cache, _published
+    with _schema_lock:
+        db_schema_cache = {
+            "tables": tables,
+            "columns": columns,
+            "column_types": column_types,
+            "ambiguous_tables": ambiguous_tables,
+            "objects": objects,
+            "jobs": jobs,
+            "_index_md": _index_md(tables, jobs),
+            "_tables_md": _tables_md(tables),
+            "_jobs_md": _jobs_md(jobs),
+        }
+        with _report_lock:
+            _report_cache.clear()
+        _published = True
+
+def load_schema_cache() -> Dict[str, int]:
+    # Built off-lock into fresh dicts (loads are single-flight, see _claim_load);
+    # readers keep using the previous snapshot until the rebind below.
+    with db_cursor() as cursor:
+        # Schema stamp, tables, columns and objects in one batch (one round-trip, four result sets)
+        cursor.execute(
+            _OBJECTS_STAMP_SQL + ";"
+            "SELECT TABLE_SCHEMA, TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE = 'BASE TABLE';"
+            "SELECT C.TABLE_NAME, C.COLUMN_NAME, C.DATA_TYPE FROM INFORMATION_SCHEMA.COLUMNS C "
+            "JOIN INFORMATION_SCHEMA.TABLES T "
+            "ON T.TABLE_SCHEMA = C.TABLE_SCHEMA AND T.TABLE_NAME = C.TABLE_NAME "
+            "WHERE T.TABLE_TYPE = 'BASE TABLE' ORDER BY C.TABLE_NAME, C.ORDINAL_POSITION;"
+            "SELECT ROUTINE_NAME AS obj FROM INFORMATION_SCHEMA.ROUTINES "
+            "UNION SELECT TABLE_NAME AS obj FROM INFORMATION_SCHEMA.VIEWS"
+        )
+        objects_stamp = _stamp_of(cursor.fetchone())
+
+        cursor.nextset()
+        # Rows are consumed straight off the cursor; no intermediate lists
+        tables: Dict[str, str] = {}
+        table_schemas: Dict[str, List[str]] = {}
+        for row in cursor:
+            tables[row.TABLE_NAME.lower()] = row.TABLE_NAME
+            table_schemas.setdefault(row.TABLE_NAME.lower(), []).append(row.TABLE_SCHEMA)
+        # Bare names that exist in several schemas: their cached columns are merged, so
+        # get_table_schema answers those from the catalog instead
+        ambiguous_tables = {k: sorted(v) for k, v in table_schemas.items() if len(v) > 1}
+
+        cursor.nextset()
+        # Rows arrive ordered by table: build each table's dict in one pass per group.
+        # Same-named tables in different schemas share a key, so merge rather than overwrite.
+        columns: Dict[str, Dict[str, str]] = {}
+        column_types: Dict[str, Dict[str, str]] = {}
+        for tname, grp in groupby(cursor, key=attrgetter("TABLE_NAME")):
+            rows = list(grp)
+            cols = {r.COLUMN_NAME.lower(): r.COLUMN_NAME for r in rows}
+            types = {r.COLUMN_NAME.lower(): r.DATA_TYPE for r in rows}
+            tkey = tname.lower()
+            if tkey in columns:
+                columns[tkey].update(cols)
+                column_types[tkey].update(types)
+            else:
+                columns[tkey] = cols
+                column_types[tkey] = types
+
+        cursor.nextset()
+        objects = {row.obj.lower(): row.obj for row in cursor}
+
+        # Stamps are read before the data they cover, so a change mid-load shows up as drift next time
+        stamp = f"{objects_stamp}/{_jobs_stamp(cursor)}"
+        try:
+            cursor.execute("SELECT name FROM msdb.dbo.sysjobs")
+            jobs = {row.name.lower(): row.name for row in cursor}
+        except Exception:
+            jobs = {}
+
+    _publish(tables, columns, column_types, objects, jobs, ambiguous_tables)
+    _save_snapshot(stamp)
 
     return {
-        "tables": len(db_schema_cache["tables"]),
-        "objects": len(db_schema_cache["objects"]),
-        "jobs": len(db_schema_cache["jobs"]),
+        "tables": len(tables),
+        "objects": len(objects),
+        "jobs": len(jobs),
     }
 
+# -----------------------
+# On-disk snapshot (fast restarts; revalidated in the background)
+# -----------------------
+_SNAPSHOT_FORMAT = 5
+# Drift stamps: a CREATE/ALTER moves the newest modify_date, a DROP moves the count.
+# Jobs live in msdb and are stamped separately (best-effort, like the jobs load itself).
+_OBJECTS_STAMP_SQL = "SELECT COUNT(*) AS n, MAX(modify_date) AS m FROM sys.objects"
+_JOBS_STAMP_SQL = "SELECT COUNT(*) AS n, MAX(date_modified) AS m FROM msdb.dbo.sysjobs"
+
+def _stamp_of(row) -> str:
+    return f"{row.n}@{row.m.isoformat() if row.m else ''}" if row is not None else "-"
+
+def _jobs_stamp(cursor) -> str:
+    try:
+        cursor.execute(_JOBS_STAMP_SQL)
+        return _stamp_of(cursor.fetchone())
+    except pyodbc.Error:
+        return "-"
+
+def _read_stamp() -> str:
+    with db_cursor() as cursor:
+        cursor.execute(_OBJECTS_STAMP_SQL)
+        objects_stamp = _stamp_of(cursor.fetchone())
+        return f"{objects_stamp}/{_jobs_stamp(cursor)}"
+
+def _snapshot_path() -> str:
+    key = f"{DB_CONFIG['server']}_{DB_CONFIG['database']}"
+    return os.path.join(SNAPSHOT_DIR, re.sub(r"[^A-Za-z0-9_.-]", "_", key) + ".json")
+
+def _save_snapshot(stamp: str) -> None:
+    path = _snapshot_path()
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        tmp = path + ".tmp"
+        # Lock out on-demand column additions while the dicts are serialized
+        with _schema_lock, open(tmp, "w", encoding="utf-8") as f:
+            data = {k: v for k, v in db_schema_cache.items() if not k.startswith("_")}
+            json.dump({"format": _SNAPSHOT_FORMAT, "stamp": stamp, "cache": data}, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.debug("Schema snapshot not written: %s", e)
+
+def load_schema_snapshot() -> Optional[str]:
+    """Seed the cache from a fresh-enough snapshot on disk; returns its schema stamp, or None if none was used."""
+    path = _snapshot_path()
+    try:
+        if time.time() - os.path.getmtime(path) > SNAPSHOT_MAX_AGE:
+            return None
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("format") != _SNAPSHOT_FORMAT or not data.get("stamp"):
+        return None
+    cache = data.get("cache") or {}
+    _publish(*(cache.get(key) or {} for key in ("tables", "columns", "column_types", "objects", "jobs", "ambiguous_tables")))
+    return data["stamp"]
+
+def revalidate_schema_snapshot(stamp: str) -> Dict[str, int]:
+    """Full reload only if the schema or job list changed since the snapshot was taken."""
+    if _read_stamp() != stamp:
+        return load_schema_cache()
+    # Still valid: restart the max-age clock so a stable schema isn't reloaded just for being old
+    try:
+        os.utime(_snapshot_path())
+    except OSError as e:
+        logger.debug("Schema snapshot not touched: %s", e)
+    snap = db_schema_cache
+    return {key: len(snap[key]) for key in ("tables", "objects", "jobs")}
+
+def _run_load(fut: Future, load: Callable[[], Dict[str, int]] = load_schema_cache) -> None:
+    try:
+        fut.set_result(load())
+    except Exception as e:
+        fut.set_exception(e)
+
+def _claim_load() -> Tuple[Future, bool]:
+    """Single-flight: return (future, True) if the caller must run the load, else the in-flight one."""
+    global _load_future
+    with _load_lock:
+        if _load_future is not None and not _load_future.done():
+            return _load_future, False
+        _load_future = Future()
+        return _load_future, True
+
+def load_schema_cache_async(load: Callable[[], Dict[str, int]] = load_schema_cache) -> Future:
+    """Start a background cache load, or return the one already running."""
+    fut, owner = _claim_load()
+    if owner:
+        threading.Thread(target=_run_load, args=(fut, load), daemon=True).start()
+    return fut
+
+def load_schema_cache_once() -> Dict[str, int]:
+    """Load on the calling thread, or wait for the load already in flight; concurrent callers share one result."""
+    fut, owner = _claim_load()
+    if owner:
+        _run_load(fut)
+    return fut.result()
+
+def _wait_for_load() -> None:
+    """Block until the in-flight (or a fresh) load finishes; a failed load leaves the cache as it was."""
+    try:
+        load_schema_cache_once()
+    except Exception:
+        pass
+
+def _ensure_loaded() -> None:
+    """Wait for the warm-up if nothing has been published yet, so lookups don't report misses for existing names."""
+    if not _published:
+        _wait_for_load()
+
+def _load_table_columns(table_name: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Fetch one table's columns on demand and add them to the current snapshot."""
+    with db_cursor() as cursor:
+        cursor.execute(
+            "SELECT COLUMN_NAME, DATA_TYPE FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME = ? ORDER BY ORDINAL_POSITION",
+            table_name,
+        )
+        rows = cursor.fetchall()
+    cols = {row.COLUMN_NAME.lower(): row.COLUMN_NAME for row in rows}
+    types = {row.COLUMN_NAME.lower(): row.DATA_TYPE for row in rows}
+    with _schema_lock:
+        snap = db_schema_cache
+        snap["columns"][table_name.lower()] = cols
+        snap["column_types"][table_name.lower()] = types
+    return cols, types
+
+# -----------------------
+# Text matchers
+# -----------------------
+@lru_cache(maxsize=1024)
+def _col_regex(col: str) -> "re.Pattern[str]":
+    """Case-insensitive whole-word matcher for a column name (memoized per name)."""
+    return re.compile(rf"\b{re.escape(col)}\b", re.IGNORECASE)
+
+_RE_WRITE_VERB = re.compile(r"\b(?:insert\s+into|update)\b", re.IGNORECASE)
+
+def _like_escape(value: str) -> str:
+    """Escape LIKE wildcards so `value` matches literally inside a pattern."""
+    return value.replace("[", "[[]").replace("%", "[%]").replace("_", "[_]")
+
+# Server-side coarse filter: only procedures mentioning the column and a write verb cross the wire.
+# Forced CI collation keeps it as permissive as the IGNORECASE regexes on case-sensitive databases.
+_PROC_CANDIDATES_SQL = (
+    "SELECT o.name AS proc_name, m.definition "
+    "FROM sys.sql_modules m JOIN sys.objects o ON o.object_id = m.object_id "
+    "WHERE o.type = 'P' AND m.definition COLLATE Latin1_General_CI_AS LIKE ? "
+    "AND (m.definition COLLATE Latin1_General_CI_AS LIKE '%INSERT%INTO%' "
+    "OR m.definition COLLATE Latin1_General_CI_AS LIKE '%UPDATE%')"
+)
+
 # -----------------------
 # Validators
 # -----------------------
 def validate_table_column(table: str, column: Optional[str] = None) -> Tuple[str, Optional[str]]:
-    with _schema_lock:
-        real_table = db_schema_cache["tables"].get(table.lower())
-        if not real_table:
-            raise ValueError(f"Table '{table}' not found.")
-        if column:
-            real_column = db_schema_cache["columns"].get(table.lower(), {}).get(column.lower())
-            if not real_column:
-                raise ValueError(f"Column '{column}' not found in table '{table}'.")
-            return real_table, real_column
+    _ensure_loaded()
+    snap = db_schema_cache
+    real_table = snap["tables"].get(table.lower())
+    cols = snap["columns"].get(table.lower())
+    if not real_table:
+        raise ValueError(f"Table '{table}' not found.")
+    if column:
+        if cols is None:
+            # Not cached yet (e.g. still loading): fetch this table's columns on demand
+            cols, _ = _load_table_columns(real_table)
+        real_column = cols.get(column.lower())
+        if not real_column:
+            raise ValueError(f"Column '{column}' not found in table '{table}'.")
+        return real_table, real_column
     return real_table, None
 
 # -----------------------
@@ -125,53 +441,101 @@ def validate_table_column(table: str, column: Optional[str] = None) -> Tuple[str
 # -----------------------
 mcp = FastMCP("SQL MCP Tool")
 
+def _offload(fn):
+    """Run a blocking (pyodbc) handler on a worker thread so the event loop keeps serving."""
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await anyio.to_thread.run_sync(partial(fn, *args, **kwargs))
+    return wrapper
+
 def _startup():
-    try:
-        load_schema_cache()
-    except Exception as e:
-        logger.warning("Schema cache load failed: %s", e)
+    # Pay connect/login for the first tool calls up front, alongside the schema load
+    threading.Thread(target=warm_pool, name="pool-warm", daemon=True).start()
+    # Serve from the last snapshot right away, then revalidate against the database in the background
+    # (a cheap stamp check; the full load only runs on drift); without a snapshot, tools and resources
+    # wait on the warm-up only if they need it first
+    stamp = load_schema_snapshot()
+    if stamp:
+        logger.info("Schema cache seeded from snapshot %s", _snapshot_path())
+        fut = load_schema_cache_async(partial(revalidate_schema_snapshot, stamp))
+    else:
+        fut = load_schema_cache_async()
+    fut.add_done_callback(
+        lambda f: f.exception() and logger.warning("Schema cache load failed: %s", f.exception())
+    )
 
 # ---- Tools ----
 @mcp.tool
+@_offload
 def refresh_schema() -> Dict[str, object]:
-    return {"success": True, **load_schema_cache()}
+    return {"success": True, **load_schema_cache_once()}
 
 @mcp.tool
+@_offload
 def get_table_schema(table: str) -> Dict[str, object]:
     table_name, _ = validate_table_column(table)
-    query = "SELECT COLUMN_NAME, DATA_TYPE FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME = ?"
-    with db_cursor() as cursor:
-        cursor.execute(query, table_name)
-        rows = cursor.fetchall()
-        columns = [{desc[0]: val for desc, val in zip(cursor.description, row)} for row in rows]
+    snap = db_schema_cache
+    if table_name.lower() in snap["ambiguous_tables"]:
+        # Same name in several schemas: report each schema's columns separately, straight from the catalog
+        with db_cursor() as cursor:
+            cursor.execute(
+                "SELECT TABLE_SCHEMA, COLUMN_NAME, DATA_TYPE FROM INFORMATION_SCHEMA.COLUMNS "
+                "WHERE TABLE_NAME = ? ORDER BY TABLE_SCHEMA, ORDINAL_POSITION",
+                table_name,
+            )
+            columns = [{"TABLE_SCHEMA": r.TABLE_SCHEMA, "COLUMN_NAME": r.COLUMN_NAME, "DATA_TYPE": r.DATA_TYPE} for r in cursor]
+        return {"success": True, "table": table_name, "schemas": snap["ambiguous_tables"][table_name.lower()], "columns": columns}
+    cols = snap["columns"].get(table_name.lower())
+    types = snap["column_types"].get(table_name.lower())
+    if cols is None or types is None:
+        # Not cached yet: fetch once and keep it for the next call
+        cols, types = _load_table_columns(table_name)
+    columns = [{"COLUMN_NAME": name, "DATA_TYPE": types.get(key)} for key, name in cols.items()]
     return {"success": True, "table": table_name, "columns": columns}
 
+def _quote_ident(name: str) -> str:
+    return "[" + name.replace("]", "]]") + "]"
+
+@lru_cache(maxsize=512)
+def _build_data_query(table: str, select_col: str, where_col: str) -> str:
+    # Inputs are validated against the schema cache, so this stays bounded by real schema size
+    return f"SELECT TOP 20 {_quote_ident(select_col)} FROM {_quote_ident(table)} WHERE {_quote_ident(where_col)} = ?"
+
 @mcp.tool
+@_offload
 def get_column_data(table: str, select_col: str, where_col: str, value: str) -> Dict[str, object]:
     table_name, _ = validate_table_column(table)
     _, select_col_real = validate_table_column(table, select_col)
     _, where_col_real = validate_table_column(table, where_col)
-    query = f"SELECT TOP 20 {select_col_real} FROM {table_name} WHERE {where_col_real} = ?"
+    query = _build_data_query(table_name, select_col_real, where_col_real)
     with db_cursor() as cursor:
         cursor.execute(query, value)
         rows = cursor.fetchall()
     return {"success": True, "results": [row[0] for row in rows]}
 
 @mcp.tool
-def get_column_population_logic(column: str) -> Dict[str, object]:
+@_offload
+def get_column_population_logic(column: str, limit: int = POPULATION_LIMIT) -> Dict[str, object]:
+    if limit <= 0:
+        return {"success": True, "column": column, "procedures": []}
     with db_cursor() as cursor:
-        cursor.execute("SELECT ROUTINE_NAME, ROUTINE_DEFINITION FROM INFORMATION_SCHEMA.ROUTINES WHERE ROUTINE_TYPE='PROCEDURE'")
+        cursor.execute(_PROC_CANDIDATES_SQL, f"%{_like_escape(column)}%")
+        col_pat = _col_regex(column)
         matches = []
-        for proc in cursor.fetchall():
-            definition = getattr(proc, "ROUTINE_DEFINITION", "")
-            if column.lower() in definition.lower() and ("insert into" in definition.lower() or "update" in definition.lower()):
-                matches.append(proc.ROUTINE_NAME)
+        # Stream rows: one definition in memory at a time, stop once `limit` are found
+        for proc in cursor:
+            definition = proc.definition or ""
+            if col_pat.search(definition) and _RE_WRITE_VERB.search(definition):
+                matches.append(proc.proc_name)
+                if len(matches) >= limit:
+                    break
     return {"success": True, "column": column, "procedures": matches}
 
 @mcp.tool
+@_offload
 def get_object_definition(object: str) -> Dict[str, object]:
-    with _schema_lock:
-        real_object = db_schema_cache["objects"].get(object.lower())
+    _ensure_loaded()
+    real_object = db_schema_cache["objects"].get(object.lower())
     if not real_object:
         raise ValueError("Object not found.")
     with db_cursor() as cursor:
@@ -179,50 +543,78 @@ def get_object_definition(object: str) -> Dict[str, object]:
         row = cursor.fetchone()
     return {"success": True, "object": real_object, "definition": row.definition if row else None}
 
+# sysjobhistory.run_status codes; anything else is reported as still running
+_RUN_STATUS = {0: "Failed", 1: "Succeeded", 2: "Retry", 3: "Canceled"}
+
+_LAST_OUTCOME_SQL = (
+    "SELECT TOP 1 j.name, h.run_date, h.run_time, h.run_status "
+    "FROM msdb.dbo.sysjobs j "
+    "LEFT JOIN msdb.dbo.sysjobhistory h ON j.job_id = h.job_id "
+    "WHERE j.name = ? AND h.step_id = 0 "
+    "ORDER BY h.run_date DESC, h.run_time DESC"
+)
+
 @mcp.tool
+@_offload
 def get_job_status(job: str) -> Dict[str, object]:
-    with _schema_lock:
-        real_job = db_schema_cache["jobs"].get(job.lower())
+    _ensure_loaded()
+    real_job = db_schema_cache["jobs"].get(job.lower())
     if not real_job:
         raise ValueError("Job not found.")
-    query = """
-        SELECT TOP 1 j.name, h.run_date, h.run_time,
-            CASE h.run_status
-                WHEN 0 THEN 'Failed' WHEN 1 THEN 'Succeeded'
-                WHEN 2 THEN 'Retry' WHEN 3 THEN 'Canceled'
-                ELSE 'Running'
-            END AS status
-        FROM msdb.dbo.sysjobs j
-        LEFT JOIN msdb.dbo.sysjobhistory h ON j.job_id = h.job_id
-        WHERE j.name = ? AND h.step_id = 0
-        ORDER BY h.run_date DESC, h.run_time DESC
-    """
     with db_cursor() as cursor:
-        cursor.execute(query, real_job)
+        cursor.execute(_LAST_OUTCOME_SQL, real_job)
         row = cursor.fetchone()
-    return {"success": True, "job": row.name, "status": row.status, "last_run_date": row.run_date, "last_run_time": row.run_time} if row else {"success": False}
+    return {"success": True, "job": row.name, "status": _RUN_STATUS.get(row.run_status, "Running"), "last_run_date": row.run_date, "last_run_time": row.run_time} if row else {"success": False}
 
 # ---- Resources ----
+# Per-column / per-job reports hit the database, so they are reused for RESOURCE_TTL seconds.
+# Handlers run on worker threads (see _offload), so every access holds _report_lock;
+# entries are kept in least-recently-used order and the LRU one is evicted when full.
+_report_cache: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+_report_lock = threading.Lock()
+_REPORT_CACHE_MAX = 256
+
+def _cached_report(kind: str, key: str, render) -> str:
+    ckey = (kind, key)
+    with _report_lock:
+        hit = _report_cache.get(ckey)
+        if hit and time.monotonic() - hit[0] < RESOURCE_TTL:
+            _report_cache.move_to_end(ckey)
+            return hit[1]
+    # Render outside the lock: it runs queries
+    text = render()
+    with _report_lock:
+        _report_cache[ckey] = (time.monotonic(), text)
+        _report_cache.move_to_end(ckey)
+        while len(_report_cache) > _REPORT_CACHE_MAX:
+            _report_cache.popitem(last=False)
+    return text
+
 @mcp.resource(
     uri="sql://column-population/{column}",
     description="Markdown report of how a column is populated across stored procedures.",
     mime_type="text/markdown",
     annotations={"readOnlyHint": True, "idempotentHint": True}
 )
+@_offload
 def resource_column_population(column: str) -> str:
+    return _cached_report("column", column.lower(), lambda: _render_column_population(column))
+
+def _render_column_population(column: str) -> str:
     with db_cursor() as cursor:
-        cursor.execute("SELECT ROUTINE_NAME, ROUTINE_DEFINITION FROM INFORMATION_SCHEMA.ROUTINES WHERE ROUTINE_TYPE='PROCEDURE'")
-        matches = []
-        for proc in cursor.fetchall():
-            definition = getattr(proc, "ROUTINE_DEFINITION", "")
-            if column.lower() in definition.lower() and ("insert into" in definition.lower() or "update" in definition.lower()):
-                matches.append((proc.ROUTINE_NAME, definition))
-    if not matches:
+        cursor.execute(_PROC_CANDIDATES_SQL, f"%{_like_escape(column)}%")
+        col_pat = _col_regex(column)
+        chunks = []
+        for proc in cursor:
+            definition = proc.definition or ""
+            if col_pat.search(definition) and _RE_WRITE_VERB.search(definition):
+                # Render the section now so only the 400-char preview outlives the row
+                chunks.append(f"## {proc.proc_name}\n```sql\n{definition[:400]}...\n```")
+                if len(chunks) >= POPULATION_LIMIT:
+                    break
+    if not chunks:
         return f"# Column Population Report\n\nNo procedures found that populate `{column}`."
-    lines = [f"# Column Population Report: `{column}`\n"]
-    for name, definition in matches:
-        lines.append(f"## {name}\n```sql\n{definition[:400]}...\n```")
-    return "\n".join(lines)
+    return "\n".join([f"# Column Population Report: `{column}`\n", *chunks])
 
 @mcp.resource(
     uri="sql://job-status/{job}",
@@ -230,22 +622,17 @@ def resource_column_population(column: str) -> str:
     mime_type="text/markdown",
     annotations={"readOnlyHint": True, "idempotentHint": True}
 )
+@_offload
 def resource_job_status(job: str) -> str:
-    with _schema_lock:
-        real_job = db_schema_cache["jobs"].get(job.lower())
+    _ensure_loaded()
+    real_job = db_schema_cache["jobs"].get(job.lower())
     if not real_job:
         return f"# Job Status\n\nJob `{job}` not found."
+    return _cached_report("job", real_job, lambda: _render_job_status(real_job))
+
+def _render_job_status(real_job: str) -> str:
     with db_cursor() as cursor:
-        cursor.execute(
-            "SELECT TOP 1 j.name, h.run_date, h.run_time, "
-            "CASE h.run_status WHEN 0 THEN 'Failed' WHEN 1 THEN 'Succeeded' "
-            "WHEN 2 THEN 'Retry' WHEN 3 THEN 'Canceled' ELSE 'Running' END AS status "
-            "FROM msdb.dbo.sysjobs j "
-            "LEFT JOIN msdb.dbo.sysjobhistory h ON j.job_id = h.job_id "
-            "WHERE j.name = ? AND h.step_id = 0 "
-            "ORDER BY h.run_date DESC, h.run_time DESC",
-            real_job,
-        )
+        cursor.execute(_LAST_OUTCOME_SQL, real_job)
         outcome = cursor.fetchone()
         cursor.execute(
             "SELECT TOP 1 h.run_date, h.run_time, h.step_id, h.step_name, h.message "
@@ -258,7 +645,7 @@ def resource_job_status(job: str) -> str:
         failure = cursor.fetchone()
     lines = [f"# Job Status: `{real_job}`\n"]
     if outcome:
-        lines.append(f"**Last Outcome:** {outcome.status} on {outcome.run_date} {outcome.run_time}")
+        lines.append(f"**Last Outcome:** {_RUN_STATUS.get(outcome.run_status, 'Running')} on {outcome.run_date} {outcome.run_time}")
     if failure:
         lines.append(f"\n**Most Recent Failure (Step {failure.step_id} - {failure.step_name}):**\n")
         lines.append("```\n" + str(failure.message) + "\n```")
@@ -270,21 +657,11 @@ def resource_job_status(job: str) -> str:
     mime_type="text/markdown",
     annotations={"readOnlyHint": True, "idempotentHint": True}
 )
+@_offload
 def resource_index() -> str:
-    if not db_schema_cache["tables"] and not db_schema_cache["jobs"]:
-        try:
-            load_schema_cache()
-        except Exception:
-            pass
-    with _schema_lock:
-        tcount = len(db_schema_cache["tables"])
-        jcount = len(db_schema_cache["jobs"])
-    return (
-        "# SQL Metadata Index\n\n"
-        f"- **Tables:** {tcount} (see `sql://tables`)\n"
-        f"- **Jobs:** {jcount} (see `sql://jobs`)\n\n"
-        "Load `sql://tables` or `sql://jobs` to see full lists."
-    )
+    _ensure_loaded()
+    snap = db_schema_cache
+    return snap.get("_index_md") or _index_md(snap["tables"], snap["jobs"])
 
 @mcp.resource(
     uri="sql://tables",
@@ -292,20 +669,11 @@ def resource_index() -> str:
     mime_type="text/markdown",
     annotations={"readOnlyHint": True, "idempotentHint": True}
 )
+@_offload
 def resource_tables() -> str:
-    if not db_schema_cache["tables"]:
-        try:
-            load_schema_cache()
-        except Exception:
-            pass
-    with _schema_lock:
-        tables = sorted(db_schema_cache["tables"].values())
-    if not tables:
-        return "# Tables\n\n_No tables found in cache. Run the `refresh_schema` tool and try again_."
-    lines = ["# Tables", "", f"Total: **{len(tables)}**", ""]
-    for t in tables:
-        lines.append(f"- {t}")
-    return "\n".join(lines)
+    _ensure_loaded()
+    snap = db_schema_cache
+    return snap.get("_tables_md") or _tables_md(snap["tables"])
 
 @mcp.resource(
     uri="sql://jobs",
@@ -313,20 +681,11 @@ def resource_tables() -> str:
     mime_type="text/markdown",
     annotations={"readOnlyHint": True, "idempotentHint": True}
 )
+@_offload
 def resource_jobs() -> str:
-    if not db_schema_cache["jobs"]:
-        try:
-            load_schema_cache()
-        except Exception:
-            pass
-    with _schema_lock:
-        jobs = sorted(db_schema_cache["jobs"].values())
-    if not jobs:
-        return "# Jobs\n\n_No jobs found in cache. Run the `refresh_schema` tool and try again_."
-    lines = ["# Jobs", "", f"Total: **{len(jobs)}**", ""]
-    for j in jobs:
-        lines.append(f"- {j}")
-    return "\n".join(lines)
+    _ensure_loaded()
+    snap = db_schema_cache
+    return snap.get("_jobs_md") or _jobs_md(snap["jobs"])
 
 # -----------------------
 # Build ASGI app for HTTP
@@ -337,7 +696,7 @@ asgi_app = make_asgi_app(mcp, path="/mcp")
 # Entry Point
 # -----------------------
 if __name__ == "__main__":
-    # Preload cache so discovery works immediately
+    # Start warming the cache so discovery is ready by the first request
     try:
         _startup()
     except Exception as e:
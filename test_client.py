@@ -1,4 +1,5 @@
 import asyncio
+import time
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
@@ -15,22 +16,35 @@ TEST_TABLE = "Departments"  # put a real table name here
 # ------------------
 
 async def main():
+    # Report lines are buffered and written once at the end (also on failure), so
+    # console writes never interleave with the round-trips being exercised
+    out = []
     params = StdioServerParameters(command=PY, args=[SERVER], env=ENV)
-    async with stdio_client(params) as (read, write):
-        async with ClientSession(read, write) as session:
-            await session.initialize()
+    try:
+        async with stdio_client(params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
 
-            tools = await session.list_tools()
-            print("TOOLS:", [t.name for t in tools.tools])
+                t0 = time.perf_counter()
+                tools = await session.list_tools()
+                out.append(f"TOOLS ({(time.perf_counter() - t0) * 1000:.0f} ms): {[t.name for t in tools.tools]}")
 
-            res = await session.call_tool("refresh_schema", {})
-            print("REFRESH:", res.content if hasattr(res, "content") else res)
+                t0 = time.perf_counter()
+                res = await session.call_tool("refresh_schema", {})
+                out.append(f"REFRESH ({(time.perf_counter() - t0) * 1000:.0f} ms): {res.content if hasattr(res, 'content') else res}")
 
-            res = await session.call_tool("get_table_schema", {"table": TEST_TABLE})
-            print("SCHEMA:", res.content if hasattr(res, "content") else res)
-
-            md = await session.read_resource("sql://index")
-            print("INDEX:\n", (md[:300] + "…") if isinstance(md, str) else md)
+                # Independent read-only checks: issue them concurrently over the one session
+                t0 = time.perf_counter()
+                res, md = await asyncio.gather(
+                    session.call_tool("get_table_schema", {"table": TEST_TABLE}),
+                    session.read_resource("sql://index"),
+                    return_exceptions=True,
+                )
+                out.append(f"SCHEMA + INDEX ({(time.perf_counter() - t0) * 1000:.0f} ms)")
+                out.append(f"SCHEMA: {res.content if hasattr(res, 'content') else res}")
+                out.append(f"INDEX:\n {(md[:300] + '…') if isinstance(md, str) else md}")
+    finally:
+        print("\n".join(out), flush=True)
 
 if __name__ == "__main__":
     asyncio.run(main())